@@ -9,7 +9,7 @@ from .worker_manager import WorkerManager
 # BaseWorker と CancellationError のみを workers からインポート
 from .workers import BaseWorker, CancellationError
 from .directory_scanner import DirectoryScannerWorker # Use this for scanning
-from .unified_thumbnail_worker import UnifiedThumbnailWorker # Use this for thumbnails
+from .unified_thumbnail_worker import UnifiedThumbnailWorker, BatchThumbnailWorker # Use this for thumbnails
 from .enhanced_image_loader import EnhancedImageLoader
 from .batch_processor import BatchProcessor
 
@@ -18,6 +18,7 @@ __all__ = [
     'BaseWorker',
     'DirectoryScannerWorker',
     'UnifiedThumbnailWorker',
+    'BatchThumbnailWorker',
     'EnhancedImageLoader',
     'BatchProcessor',
     'CancellationError',
@@ -4,23 +4,128 @@
 
 画像の一括処理を行うクラスを提供します。
 """
-from typing import List, Set, Tuple, Optional, Any, Dict, Union
-from PySide6.QtCore import QObject, Signal, Slot, QTimer, QSize # Import QSize
+import heapq
+import functools
+from collections import deque
+from typing import Deque, Iterable, List, Tuple, Optional, Any, Dict, Union
+from PySide6.QtCore import Qt, QObject, Signal, Slot, QTimer, QSize, QThreadPool # Import QSize
 from PySide6.QtGui import QPixmap # Import QPixmap for type hinting if needed
 import os  # Import os module
+import logging
+import threading
+import psutil
 
 # Use UnifiedThumbnailWorker
-from .unified_thumbnail_worker import UnifiedThumbnailWorker
+from .unified_thumbnail_worker import UnifiedThumbnailWorker, warm_up_vips
 from utils import logger, get_config
 from models import UnifiedThumbnailCache # Import cache for type hinting
 from .worker_manager import WorkerManager # Import manager for type hinting
 
+def _physical_core_count() -> int:
+    """
+    物理コア数を取得（取得できない場合は論理コア数、それも不明なら1）
+
+    Returns:
+        int: 物理コア数
+    """
+    return psutil.cpu_count(logical=False) or os.cpu_count() or 1
+
+
+class _PathQueue:
+    """
+    処理待ちの画像パスのキュー
+
+    画像パスのリストは一度だけ保持し、通常はリスト上の先頭インデックスを進めるだけで
+    取り出します（要素ごとのタプルやコピーを作りません）。取り出し済みの管理は
+    1画像1バイトの bytearray で行います。bump で優先度が付いた画像だけを
+    小さなヒープ (優先度, インデックス) に積み、先に取り出します。
+    """
+
+    def __init__(self, paths: Iterable[str] = ()):
+        self._paths: List[str] = list(paths)
+        self._taken = bytearray(len(self._paths))  # 1=取り出し済み
+        self._head = 0  # 先頭から順に取り出す位置
+        self._remaining = len(self._paths)
+        self._priority: List[Tuple[int, int]] = []  # (優先度, インデックス) のヒープ
+        # bump でパスを線形探索しないよう、パス → インデックス (重複時は最初の位置) の辞書を作る
+        self._index: Dict[str, int] = {}
+        for index, path in enumerate(self._paths):
+            self._index.setdefault(path, index)
+        self._bumped: Dict[int, int] = {}  # ヒープに積んだインデックス → 最も小さい優先度
+
+    def __len__(self) -> int:
+        return self._remaining
+
+    def pop(self) -> Tuple[int, str]:
+        """
+        次の画像を取り出す（優先度付きの画像を先に、残りは元の順序で）
+
+        Returns:
+            (index, image_path): キュー内のインデックスと画像パス
+
+        Raises:
+            IndexError: キューが空の場合
+        """
+        if not self._remaining:
+            raise IndexError("pop from empty _PathQueue")
+
+        index = -1
+        while self._priority:
+            _, candidate = heapq.heappop(self._priority)
+            if not self._taken[candidate]:
+                index = candidate
+                break
+        if index < 0:
+            while self._taken[self._head]:
+                self._head += 1
+            index = self._head
+
+        self._taken[index] = 1
+        self._remaining -= 1
+        self._bumped.pop(index, None)
+        return index, self._paths[index]
+
+    def bump(self, path: str, priority: int) -> bool:
+        """
+        未処理の画像1件を優先度付きで先に取り出されるようにする
+
+        既に同じか小さい優先度でヒープに積まれている場合は積み直しません。
+
+        Args:
+            path: 画像パス
+            priority: 優先度 (値が小さいほど先に処理)
+
+        Returns:
+            bool: 未処理の画像が見つかった場合はTrue
+        """
+        index = self._index.get(path)
+        if index is None or self._taken[index]:
+            return False
+        current = self._bumped.get(index)
+        if current is None or priority < current:
+            heapq.heappush(self._priority, (priority, index))
+            self._bumped[index] = priority
+        return True
+
+    def clear(self) -> None:
+        """キューを空にする"""
+        self._paths = []
+        self._taken = bytearray()
+        self._head = 0
+        self._remaining = 0
+        self._priority = []
+        self._index = {}
+        self._bumped = {}
+
+
 class BatchProcessor(QObject):
     """
     画像の一括処理を行うクラス
 
     大量の画像をバッチ単位で効率的に処理します。
     libvipsを使用した高速サムネイル生成に対応しています。
+    ワーカーはWorkerManagerを経由せずに起動しますが、WorkerManager.cancel_all() を呼ぶと
+    実行中のバッチもキャンセルされます。
     """
     # シグナル定義
     batch_progress = Signal(int, int)  # (processed_count, total_count)
@@ -28,6 +133,9 @@ class BatchProcessor(QObject):
     thumbnail_created = Signal(str, object)  # (image_path, thumbnail: QPixmap)
     error_occurred = Signal(str)  # エラーメッセージ
 
+    # 進捗シグナルの最小発行間隔 (ミリ秒, 約30Hz)
+    PROGRESS_INTERVAL_MS = 33
+
     def __init__(self, worker_manager: WorkerManager, thumbnail_cache: UnifiedThumbnailCache, batch_size: int = None, max_concurrent: int = None):
         """
         初期化
@@ -45,24 +153,56 @@ class BatchProcessor(QObject):
         if batch_size is None:
             batch_size = config.get("workers.batch_size", 20)
         if max_concurrent is None:
-            max_concurrent = config.get("workers.max_concurrent", 8)
+            # libvipsのスループットは物理コア数付近で頭打ちになるため、
+            # 設定値は上限として扱い、物理コア数で制限する
+            physical_cores = _physical_core_count()
+            max_concurrent = max(1, min(config.get("workers.max_concurrent", physical_cores), physical_cores))
 
         self.worker_manager = worker_manager
+        # ワーカーは共有スレッドプールに直接投入する (WorkerManager経由の登録・シグナル接続を省く)。
+        # 終了時の WorkerManager.cancel_all() でバッチもキャンセルされるよう、キャンセル処理を登録する
+        self.threadpool = QThreadPool.globalInstance()
+        worker_manager.register_cancel_hook(self.cancel)
         self.thumbnail_cache = thumbnail_cache
-        self.batch_size = batch_size
+        self.batch_size = max(1, batch_size)  # 0以下だとディスパッチが進まないため下限を設ける
         self.max_concurrent = max_concurrent
+        # libvips内部のスレッド数はプロセス全体の設定のため、ここでは変更しない
+        # (起動時に configure_vips() が VIPS_CONCURRENCY / performance.vips.concurrency から設定する)
 
         # 処理状態
-        self.queue: List[str] = []  # 処理待ちの画像パスのリスト
-        self.processing: Set[str] = set()  # 処理中の画像パスのセット (worker_id might be better?)
-        self.completed: Set[str] = set()  # 処理完了した画像パスのセット
+        # 処理待ちの画像パスのキュー (bump_priority で指定した画像を優先)
+        self.queue: _PathQueue = _PathQueue()
+        # 処理中の画像パス → ワーカー (参照を保持してワーカーのシグナルが完了まで生存するようにする)
+        # キャンセル済みのバッチのワーカーの結果を新しいバッチの結果として扱わないよう、結果はワーカーIDで照合する
+        self.active: Dict[str, UnifiedThumbnailWorker] = {}
+        self._worker_serial: int = 0  # ワーカーIDの連番 (プロセッサーの生存期間中は一意)
+        self._probed_misses: Deque[str] = deque()  # キャッシュミスを確認済みでスロットの空き待ちの画像パス
+        self.completed_count: int = 0  # 処理完了した画像の数 (エラーも含む)
         self.thumbnail_size: Tuple[int, int] = (150, 150) # Default size
+        self._thumb_params: Optional[Dict[str, Any]] = None  # バッチ共通のサムネイル生成パラメータ
         self.total_count: int = 0
+        self._total_for_progress: int = 1  # 進捗率計算用の分母 (0除算を避けるため最小1)
         self.is_processing: bool = False
-        self.current_jobs: Dict[str, str] = {} # Maps worker_id to image_path
+        # 実行中のバッチのワーカーが共有するキャンセルイベント (cancel() でセット)
+        self._cancel_event = threading.Event()
+        # _process_next_batch の再実行が予約済みかどうか
+        self._dispatch_pending: bool = False
+
+        # get_status() のキャッシュ (状態が変化するたびに _status_version を進める)
+        self._status_version: int = 0
+        self._status_cache: Optional[Dict[str, Any]] = None
+        self._status_cache_version: int = -1
+
+        # 最初のバッチが libvips の初期化待ちにならないよう事前に初期化
+        warm_up_vips()
+
+        # 進捗シグナルの間引き用タイマー (最大約30Hz)
+        self._progress_timer = QTimer(self)
+        self._progress_timer.setSingleShot(True)
+        self._progress_timer.timeout.connect(self._emit_progress_now)
 
         logger.debug(
-            f"BatchProcessor initialized: batch_size={batch_size}, max_concurrent={max_concurrent}"
+            "BatchProcessor initialized: batch_size=%d, max_concurrent=%d", batch_size, max_concurrent
         )
 
     def process_images(self, image_paths: List[str], thumbnail_size: Union[Tuple[int, int], QSize] =(150, 150)) -> None:
@@ -92,13 +232,26 @@ class BatchProcessor(QObject):
                 self.error_occurred.emit("処理する画像リストが空です")
                 return
 
+            # 重複したパスを除く (順序は維持)
+            unique_paths = list(dict.fromkeys(image_paths))
+            if len(unique_paths) != len(image_paths):
+                logger.debug("Removed %d duplicate paths from the batch.", len(image_paths) - len(unique_paths))
+            image_paths = unique_paths
+
             # 状態のリセット
-            self.queue = list(image_paths) # Make a copy
-            self.processing.clear()
-            self.completed.clear()
-            self.current_jobs.clear()
+            self.queue = _PathQueue(image_paths)
+            self.active.clear()
+            self._probed_misses.clear()
+            self.completed_count = 0
+            # キャンセル済みのイベントを使い回さないよう、バッチごとに新しく作成
+            self._cancel_event = threading.Event()
             self.thumbnail_size = proc_thumbnail_size
+            # 生成パラメータはバッチ全体で共通なので、設定の読み込みはここで1回だけ行う。
+            # 一括処理では画像サイズによらず libvips の shrink-on-load を使う
+            self._thumb_params = {**UnifiedThumbnailWorker.load_generation_params(), "prefer_vips": True}
             self.total_count = len(image_paths)
+            self._total_for_progress = max(1, self.total_count)
+            self._status_version += 1
 
             logger.info(f"Batch processing started: {self.total_count} images, thumbnail size={self.thumbnail_size}")
 
@@ -113,8 +266,29 @@ class BatchProcessor(QObject):
             self.error_occurred.emit(f"バッチ処理の開始に失敗しました: {e}")
             self.is_processing = False # Ensure state is reset on error
 
+    def _schedule_dispatch(self) -> None:
+        """
+        _process_next_batch の再実行を予約
+
+        既に予約済みの場合は何もしないため、完了が連続しても
+        イベントループに積まれる再実行は1回にまとまります。
+        """
+        if self._dispatch_pending:
+            return
+        self._dispatch_pending = True
+        QTimer.singleShot(0, self._process_next_batch)
+
     def _process_next_batch(self) -> None:
-        """次のバッチを処理"""
+        """
+        次のバッチを処理
+
+        キャッシュの確認は空きスロットに関係なくバッチ単位で進め、キャッシュヒットは
+        ワーカーを使わずにこの呼び出し内で通知します。ミスした画像だけが空きスロットの
+        範囲でワーカーに渡され、残りは確認済みのまま次の空きを待ちます。
+        イベントループへの再投入はワーカーの完了時 (_handle_worker_completion) にのみ行います。
+        """
+        self._dispatch_pending = False
+        self._status_version += 1
         # Use try-except block for safety
         try:
              # Check if processing should stop
@@ -122,100 +296,24 @@ class BatchProcessor(QObject):
                 logger.info("Processing stopped or cancelled.")
                 return
 
+            while self.is_processing:
+                # 確認済みのミスを空きスロットに投入
+                self._start_probed_workers()
+                # スロットが埋まってミスが残っている場合、またはキューが空の場合は待機
+                if self._probed_misses or not self.queue:
+                    break
+                # 次のバッチのキャッシュを確認 (ヒットのみならスロットを使わずに消化される)
+                self._probe_next_batch()
+
             # すべての処理が完了した場合 (queue is empty AND no jobs are processing)
-            if not self.queue and not self.current_jobs:
-                logger.info(f"Batch processing completed: {len(self.completed)}/{self.total_count} images.")
+            if self.is_processing and not self.queue and not self._probed_misses and not self.active:
+                logger.info(f"Batch processing completed: {self.completed_count}/{self.total_count} images.")
                 self.is_processing = False
-                # Final progress update
-                self._update_progress()
+                # Final progress update (保留中の間引きタイマーを待たずに即時発行)
+                self._emit_progress_now()
                 self.batch_completed.emit()
-                return
-
-            # 処理中のワーカーが最大数に達している場合は待機
-            active_workers = len(self.current_jobs)
-            if active_workers >= self.max_concurrent:
-                logger.debug(f"Max concurrent batch workers reached ({active_workers}/{self.max_concurrent}). Waiting.")
-                return
-
-            # 次のバッチを取得
-            slots_available = self.max_concurrent - active_workers
-            batch_limit = min(self.batch_size, slots_available, len(self.queue))
-
-            if batch_limit <= 0:
-                # No slots or no items in queue, but still processing jobs, so just return
-                # logger.debug("No slots available or queue empty, waiting for jobs to finish.")
-                return
-
-            logger.debug(f"Preparing next batch: Trying to get up to {batch_limit} tasks.")
-
-            batch_paths = [self.queue.pop(0) for _ in range(batch_limit)]
-
-            logger.debug(f"Starting batch processing for {len(batch_paths)} tasks.")
-
-            # バッチ内の各画像に対してワーカーを作成
-            for image_path in batch_paths:
-                # Check if processing should stop
-                if not self.is_processing:
-                    logger.info("Processing stopped during batch creation.")
-                    # Put remaining paths back? Or just stop? Stopping for now.
-                    self.queue.insert(0, image_path) # Put back the current one
-                    return
-
-                # Generate a unique worker ID
-                worker_id = f"batch_{os.path.basename(image_path)}_{self.thumbnail_size[0]}x{self.thumbnail_size[1]}_{time.time()}"
-
-                # Check cache first
-                cached_thumbnail = None
-                if self.thumbnail_cache:
-                    cached_thumbnail = self.thumbnail_cache.get_thumbnail(image_path, self.thumbnail_size)
-
-                if cached_thumbnail and not cached_thumbnail.isNull():
-                    logger.debug(f"Cache hit (batch): {image_path}")
-                    # Emit the result directly
-                    self.thumbnail_created.emit(image_path, cached_thumbnail)
-                    self.completed.add(image_path)
-                    self._update_progress()
-                    # Try to process next immediately if cache hit
-                    QTimer.singleShot(0, self._process_next_batch)
-                    continue # Skip worker creation
-
-                # If cache miss, start worker
-                logger.debug(f"Starting worker {worker_id} for image: {image_path}")
-
-                # Add to processing BEFORE starting worker
-                self.current_jobs[worker_id] = image_path
-                self.processing.add(image_path) # Keep track of image paths being processed
-
-                try:
-                    # Use UnifiedThumbnailWorker
-                    worker = UnifiedThumbnailWorker(image_path, self.thumbnail_size, self.thumbnail_cache, worker_id=worker_id)
-
-                    # Connect signals using lambda to capture worker_id
-                    worker.signals.result.connect(lambda result, w_id=worker_id: self._on_thumbnail_created(w_id, result))
-                    worker.signals.error.connect(lambda error, w_id=worker_id: self._on_worker_error(w_id, error))
-                    # Finished signal might not be needed if handled by WorkerManager
-                    # worker.signals.finished.connect(lambda w_id=worker_id: self._on_worker_finished(w_id))
-
-                    # Start worker via WorkerManager
-                    if not self.worker_manager.start_worker(worker_id, worker):
-                         logger.error(f"Failed to start worker {worker_id} for image {image_path}")
-                         # Clean up if worker failed to start
-                         self.current_jobs.pop(worker_id, None)
-                         self.processing.discard(image_path)
-                         self._on_worker_error(worker_id, f"Failed to start worker") # Simulate error
-
-                except Exception as e:
-                    logger.exception(f"Error creating worker {worker_id} for {image_path}: {e}")
-                    # Clean up on creation error
-                    self.current_jobs.pop(worker_id, None)
-                    self.processing.discard(image_path)
-                    self._on_worker_error(worker_id, f"Worker creation failed: {e}")
-
-            # After submitting a batch, check if more can be processed immediately
-            # This helps fill slots quickly if cache hits occur
-            if len(self.current_jobs) < self.max_concurrent and self.queue:
-                 QTimer.singleShot(0, self._process_next_batch)
-
+            elif self._probed_misses:
+                logger.debug("Max concurrent batch workers reached (%d/%d). Waiting.", len(self.active), self.max_concurrent)
 
         except Exception as e:
              logger.exception(f"Error in _process_next_batch loop: {e}")
@@ -223,62 +321,148 @@ class BatchProcessor(QObject):
              # Attempt to recover or stop cleanly
              self.is_processing = False # Stop processing on loop error
 
+    def _probe_next_batch(self) -> None:
+        """キューから batch_size 件を取り出してキャッシュを確認し、ヒットを通知してミスを確認済みに回す"""
+        batch_limit = min(self.batch_size, len(self.queue))
+        batch_items = [self.queue.pop() for _ in range(batch_limit)]
+        batch_paths = [image_path for _, image_path in batch_items]
+
+        logger.debug("Probing cache for %d tasks.", len(batch_paths))
+
+        # メモリキャッシュのみをバッチ単位で一括チェック (ロック取得は1回のみ)。
+        # キャッシュキーに更新時刻を含めるため、ここで行うのはパスごとの stat のみで、
+        # ヒット時のアクセス時間のDB書き込みはキャッシュ側でスレッドプールにまとめて回される。
+        # ディスクキャッシュの読み込みはGUIスレッドをブロックするため、
+        # ミスした画像のワーカー側 (UnifiedThumbnailWorker.work) に任せて並列に行う。
+        cached = self.thumbnail_cache.get_thumbnails_bulk(batch_paths, self.thumbnail_size, memory_only=True) if self.thumbnail_cache else {}
+
+        # キャッシュヒットとミスに振り分け
+        hit_paths: List[str] = []
+        for image_path in batch_paths:
+            cached_thumbnail = cached.get(image_path)
+            if cached_thumbnail and not cached_thumbnail.isNull():
+                hit_paths.append(image_path)
+            else:
+                self._probed_misses.append(image_path)
+
+        # キャッシュヒットはイベントループを経由せず、この呼び出し内でまとめて処理
+        if hit_paths:
+            logger.debug("Cache hits (batch): %d", len(hit_paths))
+            for image_path in hit_paths:
+                self.thumbnail_created.emit(image_path, cached[image_path])
+            self.completed_count += len(hit_paths)
+            self._update_progress()
+
+    def _start_probed_workers(self) -> None:
+        """キャッシュミスが確認済みの画像について、空きスロットの範囲でワーカーを起動"""
+        probed_misses = self._probed_misses
+        while probed_misses and len(self.active) < self.max_concurrent:
+            image_path = probed_misses.popleft()
+
+            # If cache miss, start worker
+            logger.debug("Starting worker for image: %s", image_path)
+
+            try:
+                # Use UnifiedThumbnailWorker.
+                # Worker ids are unique across batch runs, so a late result from a
+                # cancelled batch is never mistaken for the current worker of the same path.
+                self._worker_serial += 1
+                worker_id = f"batch_{self._worker_serial}"
+                worker = UnifiedThumbnailWorker(image_path, self.thumbnail_size, self.thumbnail_cache,
+                                                worker_id=worker_id, cancel_event=self._cancel_event,
+                                                params=self._thumb_params)
+
+                # Connect signals with functools.partial to pass the worker id / image path
+                worker.signals.result.connect(functools.partial(self._on_thumbnail_created, worker_id=worker_id),
+                                              Qt.ConnectionType.QueuedConnection)
+                worker.signals.failed.connect(functools.partial(self._on_worker_error, image_path=image_path),
+                                              Qt.ConnectionType.QueuedConnection)
+
+                # Add to active BEFORE starting worker
+                self.active[image_path] = worker
+
+                # 共有スレッドプールで直接実行
+                self.threadpool.start(worker)
+
+            except Exception as e:
+                logger.exception(f"Error creating worker for {image_path}: {e}")
+                # Clean up on creation error and count the image as completed
+                self.active.pop(image_path, None)
+                self.error_occurred.emit(f"画像処理エラー: {image_path} - Worker creation failed: {e}")
+                self.completed_count += 1
+                self._update_progress()
+
 
-    # These slots receive worker_id now
-    @Slot(str, tuple) # worker_id, result=(image_path, thumbnail)
-    def _on_thumbnail_created(self, worker_id: str, result: Tuple[str, QPixmap]) -> None:
+    def _is_current_worker(self, image_path: str, worker_id: str) -> bool:
         """
-        サムネイル作成完了時の処理 (Worker ID aware)
+        ワーカーが画像パスに対して現在登録されているワーカーかどうかを返す
+
+        Args:
+            image_path: 画像パス
+            worker_id: ワーカーID
+
+        Returns:
+            bool: 現在のバッチで処理中のワーカーの場合はTrue
         """
-        if worker_id not in self.current_jobs:
-            logger.warning(f"Received result for unknown or finished worker: {worker_id}")
-            return # Ignore stale signals
+        worker = self.active.get(image_path)
+        return worker is not None and worker.worker_id == worker_id
+
+    def _on_thumbnail_created(self, result: Tuple[str, QPixmap], worker_id: str) -> None:
+        """
+        サムネイル作成完了時の処理
 
+        Args:
+            result: (image_path, thumbnail)
+            worker_id: 結果を発行したワーカーのID
+        """
         image_path, thumbnail = result
-        logger.debug(f"Worker {worker_id} completed successfully for {image_path}.")
+        if not self._is_current_worker(image_path, worker_id):
+            logger.debug("Ignoring stale result from worker %s: %s", worker_id, image_path)
+            return # Ignore stale signals
+
+        logger.debug("Worker completed successfully for %s.", image_path)
 
         if not thumbnail or thumbnail.isNull():
-            logger.warning(f"Worker {worker_id} returned invalid thumbnail for {image_path}")
+            logger.warning(f"Worker returned invalid thumbnail for {image_path}")
             self.error_occurred.emit(f"無効なサムネイルが生成されました: {image_path}")
             # Treat as error for completion logic
-            self._handle_worker_completion(worker_id, success=False)
+            self._handle_worker_completion(image_path, success=False)
             return
 
-        # Emit signal
         self.thumbnail_created.emit(image_path, thumbnail)
-        self._handle_worker_completion(worker_id, success=True)
+        self._handle_worker_completion(image_path, success=True)
 
 
-    @Slot(str, str) # worker_id, error_message
-    def _on_worker_error(self, worker_id: str, error: str) -> None:
+    def _on_worker_error(self, worker_id: str, error: str, image_path: str) -> None:
         """
-        ワーカーエラー時の処理 (Worker ID aware)
+        ワーカーエラー時の処理
+
+        Args:
+            worker_id: エラーを発行したワーカーのID
+            error: エラーメッセージ
+            image_path: ワーカーが処理していた画像パス
         """
-        if worker_id not in self.current_jobs:
-             logger.warning(f"Received error for unknown or finished worker: {worker_id}")
+        if not self._is_current_worker(image_path, worker_id):
+             logger.debug("Ignoring stale error from worker %s: %s", worker_id, image_path)
              return # Ignore stale signals
 
-        image_path = self.current_jobs.get(worker_id, "Unknown Image")
-        logger.error(f"Worker {worker_id} error for {image_path}: {error}")
+        logger.error(f"Worker error for {image_path}: {error}")
         self.error_occurred.emit(f"画像処理エラー: {image_path} - {error}")
 
-        self._handle_worker_completion(worker_id, success=False)
+        self._handle_worker_completion(image_path, success=False)
 
-    def _handle_worker_completion(self, worker_id: str, success: bool) -> None:
+    def _handle_worker_completion(self, image_path: str, success: bool) -> None:
         """Handles common logic when a worker finishes (success or error)."""
-        if worker_id not in self.current_jobs:
+        if self.active.pop(image_path, None) is None:
              return # Already handled or unknown
 
-        image_path = self.current_jobs.pop(worker_id, None)
-        if image_path:
-             self.processing.discard(image_path)
-             self.completed.add(image_path) # Mark as completed regardless of success for progress
+        self.completed_count += 1 # Count as completed regardless of success for progress
 
         self._update_progress()
 
         # Trigger processing the next batch if processing is still active
         if self.is_processing:
-            QTimer.singleShot(0, self._process_next_batch) # Use QTimer for safety
+            self._schedule_dispatch() # Use QTimer for safety (coalesced)
 
 
     # This slot might not be needed if WorkerManager handles finish notification
@@ -291,23 +475,50 @@ class BatchProcessor(QObject):
     #     pass
 
 
+    PRIORITY_VISIBLE = -1  # 表示領域内 (bump_priority の既定値)
+
+    def bump_priority(self, image_path: str, priority: int = PRIORITY_VISIBLE) -> bool:
+        """
+        処理待ちの画像1件の優先度を上げる
+
+        Args:
+            image_path: 画像パス
+            priority: 優先度 (値が小さいほど先に処理、既定は表示領域内と同じ)
+
+        Returns:
+            bool: 画像がまだ処理待ちだった場合はTrue
+        """
+        bumped = self.queue.bump(image_path, priority)
+        if bumped:
+            logger.debug("Priority bumped to %d: %s", priority, image_path)
+        return bumped
+
     def _update_progress(self) -> None:
-        """進捗状況を更新"""
-        # Ensure thread safety if needed, though likely called from main thread via signals
-        processed_count = len(self.completed)
-        try:
-            progress_percent = int(100 * processed_count / max(1, self.total_count)) if self.total_count > 0 else 0
-        except ZeroDivisionError:
-            progress_percent = 0
+        """
+        進捗状況の更新を予約
 
-        logger.debug(f"Batch progress: {processed_count}/{self.total_count} ({progress_percent}%)")
+        完了ごとに batch_progress を発行するとUIの再描画が頻発するため、
+        PROGRESS_INTERVAL_MS ごとに最大1回にまとめて発行します。
+        """
+        self._status_version += 1
+        if not self._progress_timer.isActive():
+            self._progress_timer.start(self.PROGRESS_INTERVAL_MS)
+
+    @Slot()
+    def _emit_progress_now(self) -> None:
+        """現在の進捗状況を即座に発行"""
+        self._progress_timer.stop()
+        processed_count = self.completed_count
+        if logger.isEnabledFor(logging.DEBUG):
+            progress_percent = 100 * processed_count // self._total_for_progress
+            logger.debug("Batch progress: %d/%d (%d%%)", processed_count, self.total_count, progress_percent)
         self.batch_progress.emit(processed_count, self.total_count)
 
     def is_complete(self) -> bool:
         """
         すべての処理が完了したかどうかを返す
         """
-        return not self.is_processing and len(self.completed) == self.total_count and not self.current_jobs
+        return not self.is_processing and self.completed_count == self.total_count and not self.active
 
     def cancel(self) -> None:
         """処理を中止"""
@@ -317,30 +528,23 @@ class BatchProcessor(QObject):
 
         logger.info("Attempting to cancel batch processing.")
         self.is_processing = False # Stop scheduling new tasks immediately
+        self._progress_timer.stop()
+        self._status_version += 1
 
         try:
-            # Cancel running workers managed by WorkerManager
-            cancelled_count = 0
-            # Make a copy of keys to avoid modification during iteration
-            worker_ids_to_cancel = list(self.current_jobs.keys())
-            logger.debug(f"Cancelling {len(worker_ids_to_cancel)} active workers.")
-
-            for worker_id in worker_ids_to_cancel:
-                if self.worker_manager.cancel_worker(worker_id):
-                    cancelled_count += 1
-                # Remove from current_jobs even if cancel fails, as we're stopping
-                image_path = self.current_jobs.pop(worker_id, None)
-                if image_path:
-                     self.processing.discard(image_path)
-                     # Don't add to completed on cancel
+            # 共有キャンセルイベントをセットして実行中・待機中のワーカーをまとめてキャンセル
+            self._cancel_event.set()
+            cancelled_count = len(self.active)
+            logger.debug("Cancelling %d active workers.", cancelled_count)
 
             # Clear the queue
             queue_count = len(self.queue)
             self.queue.clear()
 
             # Reset remaining state variables
-            self.processing.clear()
-            self.current_jobs.clear() # Should be empty now
+            queue_count += len(self._probed_misses)
+            self._probed_misses.clear()
+            self.active.clear()
 
             logger.info(f"Batch processing cancelled: {cancelled_count} workers cancelled, {queue_count} tasks discarded.")
             # Emit completed signal on cancellation? Or a specific cancelled signal?
@@ -351,27 +555,32 @@ class BatchProcessor(QObject):
             logger.exception(f"Error during batch processing cancellation: {e}")
             # Ensure processing state is false even if cancel encounters errors
             self.is_processing = False
-            self.processing.clear()
-            self.current_jobs.clear()
+            self.active.clear()
+            self._probed_misses.clear()
             self.queue.clear()
 
 
     def get_status(self) -> Dict[str, Any]:
         """
         現在の処理状態の情報を取得
+
+        状態が前回の呼び出しから変化していない場合はキャッシュした辞書を返します
+        (呼び出し側で変更しないでください)。
         """
-        processed_count = len(self.completed)
-        try:
-             progress_percent = int(100 * processed_count / max(1, self.total_count)) if self.total_count > 0 else 0
-        except ZeroDivisionError:
-             progress_percent = 0
+        if self._status_cache is not None and self._status_cache_version == self._status_version:
+            return self._status_cache
+
+        processed_count = self.completed_count
+        progress_percent = 100 * processed_count // self._total_for_progress
 
-        return {
+        self._status_cache_version = self._status_version
+        self._status_cache = {
             "is_processing": self.is_processing,
-            "queued": len(self.queue),
-            "processing": len(self.current_jobs), # Use current_jobs length
+            "queued": len(self.queue) + len(self._probed_misses),
+            "processing": len(self.active),
             "completed": processed_count,
             "total": self.total_count,
             "progress_percent": progress_percent
         }
+        return self._status_cache
 # --- END REFACTORED controllers/batch_processor.py ---
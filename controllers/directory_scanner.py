@@ -6,6 +6,8 @@
 """
 import os
 import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from typing import List, Set, Optional, Tuple
 
 from PySide6.QtCore import QObject, Signal, Slot
@@ -19,6 +21,9 @@ class DirectoryScannerWorker(BaseWorker):
     大量のファイルを含むディレクトリでも効率的に動作し、
     進捗状況を定期的に報告します。
     """
+    # 進捗率の計算に使う概算ファイル数 (これを超えると95%のまま完了を待つ)
+    PROGRESS_ESTIMATE_FILES = 10000
+    
     def __init__(self, directory: str, image_extensions: Optional[List[str]] = None, 
                  batch_size: int = None, recursive: bool = True):
         """
@@ -42,14 +47,22 @@ class DirectoryScannerWorker(BaseWorker):
             image_extensions = config.get_supported_extensions()
         if batch_size is None:
             batch_size = config.get("workers.batch_size", 100)
+        # サブツリーを並列に走査するスレッド数 (1以下の場合は順次走査)
+        self.scanner_threads = config.get("workers.scanner_threads", 4)
             
         self.image_extensions = image_extensions
+        # 判定用に小文字化・重複除去した拡張子
+        self._ext_set = frozenset(ext.lower() for ext in image_extensions)
+        # 拡張子を探す範囲 (ファイル名末尾の最長拡張子分だけを見る)
+        self._max_ext_len = max((len(ext) for ext in self._ext_set), default=0)
         self.batch_size = batch_size
         
         # ファイル数などの統計情報
         self.total_files_scanned = 0
         self.total_images_found = 0
         self.total_directories_scanned = 0
+        self._stats_lock = threading.Lock()  # 並列スキャン時の統計情報更新用
+        self._last_reported_files = 0
         
         logger.debug(
             f"DirectoryScannerWorker初期化: directory={directory}, "
@@ -91,94 +104,26 @@ class DirectoryScannerWorker(BaseWorker):
         
         start_time = time.time()
         image_files = []
-        total_files_estimate = 0
-        processed_files = 0
         
         try:
-            # 対象ファイル数を概算（大規模ディレクトリでは完全なカウントは遅いため）
-            self.update_progress(1, "ファイル数を概算中...")
-            
-            if self.recursive:
-                for _, _, files in os.walk(self.directory):
-                    self.check_cancelled()
-                    total_files_estimate += len(files)
-                    
-                    # 非常に大きなディレクトリの場合は早めに抜ける
-                    if total_files_estimate > 10000:
-                        total_files_estimate = 10000  # 概算値として十分
-                        break
-            else:
-                # 再帰的でない場合は、トップディレクトリのみのファイル数を取得
-                total_files_estimate = len(os.listdir(self.directory))
+            # スキャンの実行
+            # 事前のファイル数の概算 (ディレクトリ全体の二重走査) は行わず、
+            # 処理済みファイル数から進捗を報告する
+            self.update_progress(2, "ファイルスキャン中...")
             
-            logger.debug(f"推定ファイル数: {total_files_estimate}")
+            # トップディレクトリを読み、直下のサブディレクトリごとに走査を分担する
+            top_images, subdirs = self._scan_directory(self.directory)
+            image_files.extend(top_images)
             
-            # スキャンの実行
-            self.update_progress(2, f"ファイルスキャン中... 約 {total_files_estimate} ファイル")
+            if not self.recursive:
+                subdirs = []
             
-            # バッチ処理でファイルを収集
-            if self.recursive:
-                # 再帰的なスキャン
-                for root, dirs, files in os.walk(self.directory):
-                    self.check_cancelled()
-                    
-                    self.total_directories_scanned += 1
-                    batch = []
-                    
-                    for file in files:
-                        self.check_cancelled()
-                        
-                        processed_files += 1
-                        self.total_files_scanned += 1
-                        
-                        # 定期的に進捗を報告
-                        if processed_files % self.batch_size == 0:
-                            progress = min(95, int(100 * processed_files / max(1, total_files_estimate)))
-                            self.update_progress(
-                                progress, 
-                                f"スキャン中: {processed_files}/{total_files_estimate} ファイル, {len(image_files)} 画像が見つかりました"
-                            )
-                        
-                        # 拡張子をチェック
-                        ext = os.path.splitext(file.lower())[1]
-                        if ext in self.image_extensions:
-                            image_path = os.path.join(root, file)
-                            batch.append(image_path)
-                            self.total_images_found += 1
-                    
-                    # バッチをリストに追加
-                    image_files.extend(batch)
+            if len(subdirs) > 1 and self.scanner_threads > 1:
+                # ディレクトリ走査はI/O待ちが支配的なため、サブツリー単位でスレッド並列化する
+                image_files.extend(self._scan_trees_parallel(subdirs))
             else:
-                # 非再帰的なスキャン（トップディレクトリのみ）
-                files = [f for f in os.listdir(self.directory) 
-                         if os.path.isfile(os.path.join(self.directory, f))]
-                
-                self.total_directories_scanned = 1
-                batch = []
-                
-                for file in files:
-                    self.check_cancelled()
-                    
-                    processed_files += 1
-                    self.total_files_scanned += 1
-                    
-                    # 定期的に進捗を報告
-                    if processed_files % self.batch_size == 0:
-                        progress = min(95, int(100 * processed_files / max(1, len(files))))
-                        self.update_progress(
-                            progress, 
-                            f"スキャン中: {processed_files}/{len(files)} ファイル, {len(image_files)} 画像が見つかりました"
-                        )
-                    
-                    # 拡張子をチェック
-                    ext = os.path.splitext(file.lower())[1]
-                    if ext in self.image_extensions:
-                        image_path = os.path.join(self.directory, file)
-                        batch.append(image_path)
-                        self.total_images_found += 1
-                
-                # バッチをリストに追加
-                image_files.extend(batch)
+                for subdir in subdirs:
+                    image_files.extend(self._scan_tree(subdir, report_progress=True))
             
             # 最終進捗を報告
             elapsed_time = time.time() - start_time
@@ -204,7 +149,7 @@ class DirectoryScannerWorker(BaseWorker):
             logger.info(
                 f"ディレクトリスキャンがキャンセルされました: {self.directory}, "
                 f"画像ファイル数={len(image_files)}, "
-                f"処理済みファイル数={processed_files}, "
+                f"処理済みファイル数={self.total_files_scanned}, "
                 f"所要時間={elapsed_time:.2f}秒"
             )
             raise
@@ -215,11 +160,142 @@ class DirectoryScannerWorker(BaseWorker):
             logger.error(
                 f"ディレクトリスキャンエラー: {self.directory}, "
                 f"エラー={str(e)}, "
-                f"処理済みファイル数={processed_files}, "
+                f"処理済みファイル数={self.total_files_scanned}, "
                 f"所要時間={elapsed_time:.2f}秒"
             )
             raise
     
+    def _scan_directory(self, directory: str) -> Tuple[List[str], List[str]]:
+        """
+        1つのディレクトリの直下をスキャン
+        
+        DirEntry の name/path と種別判定をそのまま使い、パス結合や再statを避けます。
+        複数スレッドから呼ばれるため、統計情報の更新はロックで保護します。
+        
+        Args:
+            directory: スキャンするディレクトリのパス
+            
+        Returns:
+            (画像ファイルパスのリスト, サブディレクトリパスのリスト)
+        """
+        ext_set = self._ext_set
+        ext_start = -self._max_ext_len
+        images = []
+        subdirs = []
+        # ループ内の属性参照を避けるためメソッドをローカルに束縛
+        add_image = images.append
+        add_subdir = subdirs.append
+        file_count = 0
+        
+        try:
+            scanner = os.scandir(directory)
+        except OSError as e:
+            # os.walk と同様、読めないサブディレクトリはスキップ
+            logger.debug(f"ディレクトリを読み込めません: {directory} ({e})")
+            return [], []
+        
+        # 中間リストを作らず、イテレータから直接振り分ける
+        try:
+            with scanner:
+                for entry in scanner:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            add_subdir(entry.path)
+                            continue
+                        if not entry.is_file():
+                            continue
+                    except OSError:
+                        continue
+                    
+                    file_count += 1
+                    # 拡張子をチェック (ファイル名全体ではなく末尾の拡張子部分だけを小文字化)
+                    # os.path.splitext と同じく、先頭のドットは拡張子ではなく名前の一部として扱う (".jpg" は対象外)
+                    name = entry.name
+                    dot = name.rfind('.', ext_start)
+                    if dot > 0 and name[dot:].lower() in ext_set and name[:dot].lstrip('.'):
+                        add_image(entry.path)
+        except OSError as e:
+            # 列挙途中で読めなくなった場合は、それまでの結果を使う
+            logger.debug(f"ディレクトリの列挙中にエラー: {directory} ({e})")
+        
+        with self._stats_lock:
+            self.total_directories_scanned += 1
+            self.total_files_scanned += file_count
+            self.total_images_found += len(images)
+        
+        return images, subdirs
+    
+    def _scan_tree(self, root: str, report_progress: bool = False) -> List[str]:
+        """
+        サブツリーを再帰的にスキャン
+        
+        明示的なスタックで走査し、子ディレクトリを逆順に積むことで
+        os.walk と同じ順序（深さ優先・先行順）で結果を返します。
+        
+        Args:
+            root: スキャンするサブツリーのルート
+            report_progress: 進捗を報告するかどうか（ワーカー自身のスレッドで実行する場合のみTrue）
+            
+        Returns:
+            List[str]: 画像ファイルパスのリスト
+        """
+        images = []
+        pending_dirs = [root]
+        while pending_dirs:
+            self.check_cancelled()
+            dir_images, subdirs = self._scan_directory(pending_dirs.pop())
+            images.extend(dir_images)
+            pending_dirs.extend(reversed(subdirs))
+            if report_progress:
+                self._report_scan_progress()
+        return images
+    
+    def _scan_trees_parallel(self, roots: List[str]) -> List[str]:
+        """
+        複数のサブツリーをスレッドプールで並列にスキャン
+        
+        結果は roots の順序で連結するため、順次スキャンと同じ並びになります。
+        
+        Args:
+            roots: スキャンするサブツリーのルートのリスト
+            
+        Returns:
+            List[str]: 画像ファイルパスのリスト
+        """
+        executor = ThreadPoolExecutor(max_workers=self.scanner_threads, thread_name_prefix="dir_scan")
+        try:
+            futures = [executor.submit(self._scan_tree, root) for root in roots]
+            pending = set(futures)
+            while pending:
+                # 進捗報告とキャンセル確認はワーカー自身のスレッドで行う
+                _, pending = wait(pending, timeout=0.1, return_when=FIRST_COMPLETED)
+                self.check_cancelled()
+                self._report_scan_progress()
+            
+            images = []
+            for future in futures:
+                images.extend(future.result())
+            return images
+        finally:
+            # キャンセル時やエラー時は未開始のサブツリーを破棄
+            executor.shutdown(wait=True, cancel_futures=True)
+    
+    def _report_scan_progress(self) -> None:
+        """
+        前回の報告から batch_size 件以上スキャンが進んでいれば進捗を報告
+        
+        総数は不明なため、概算の上限 (PROGRESS_ESTIMATE_FILES) に対する割合で報告します。
+        """
+        scanned = self.total_files_scanned
+        if scanned - self._last_reported_files < self.batch_size:
+            return
+        self._last_reported_files = scanned
+        progress = min(95, 2 + int(93 * scanned / self.PROGRESS_ESTIMATE_FILES))
+        self.update_progress(
+            progress, 
+            f"スキャン中: {scanned} ファイル, {self.total_images_found} 画像が見つかりました"
+        )
+    
     def get_stats(self) -> dict:
         """
         スキャンの統計情報を取得
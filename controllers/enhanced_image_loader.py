@@ -5,25 +5,32 @@
 効率的な画像の読み込みと処理を管理するクラスを提供します。
 """
 import os
+import heapq
+import itertools
+import functools
+import psutil
 # Import QTimer from PySide6.QtCore
-from PySide6.QtCore import QObject, Signal, Slot, QSize, QThread, QMutex, QTimer
+from PySide6.QtCore import QObject, Signal, Slot, QSize, QThread, QTimer
 from PySide6.QtGui import QPixmap, Qt
 
 # UnifiedThumbnailWorker をインポート
-from .unified_thumbnail_worker import UnifiedThumbnailWorker
+from .unified_thumbnail_worker import UnifiedThumbnailWorker, BatchThumbnailWorker
 from .directory_scanner import DirectoryScannerWorker
-from utils import logger # ロガーを追加
+from utils import logger, get_config # ロガーを追加
 
 class ThumbnailRequest:
     """サムネイルリクエストを表すクラス"""
 
+    # リクエストは大量に作られるため、インスタンス辞書を持たない
+    __slots__ = ('image_path', 'size', 'priority', 'timestamp')
+
     def __init__(self, image_path, size, priority=0):
         """
         初期化
 
         Args:
             image_path (str): 画像のパス
-            size (QSize): 生成するサムネイルのサイズ
+            size (tuple): 生成するサムネイルのサイズ (width, height)
             priority (int, optional): 優先度 (大きいほど優先)
         """
         self.image_path = image_path
@@ -64,13 +71,27 @@ class EnhancedImageLoader(QObject):
         self.total_tasks = 0
 
         # リクエスト管理
+        # 処理待ちリクエストのヒープ。エントリは [-優先度, 連番, リクエストキー, リクエスト, 有効フラグ]。
+        # 優先度を上げる場合は古いエントリを無効化して積み直す (取り出し時に無効なエントリを読み飛ばす)
         self.pending_requests = []
+        # 画像パス → {サイズ: ヒープのエントリ} (重複チェック・優先度更新・同じ画像の別サイズの取得用)
+        self._pending_index = {}
+        self._request_seq = itertools.count()  # 同じ優先度のリクエストを到着順に処理するための連番
         self.active_requests = set()
-        self.request_mutex = QMutex() # Use QMutex for thread safety with Qt signals/slots
+        self._process_scheduled = False  # _process_next_request の呼び出しが予約済みかどうか
+        # リクエストのキューはGUIスレッドからのみ操作するためロックは使わない
+        # (ワーカーのシグナルはキュー接続でこのオブジェクトのスレッドに戻す)
+
+        # 同時処理数は設定値を上限とし、物理コア数で制限する
+        # (libvipsのスループットは物理コア数付近で頭打ちになり、それ以上はスレッドの競合が増えるだけのため。
+        #  各ワーカー内のlibvipsのスレッド数は performance.vips.concurrency で1に抑えている)
+        physical_cores = psutil.cpu_count(logical=False) or os.cpu_count() or 1
+        configured = get_config().get("thumbnails.generation.concurrent_thumbnails", 8)
+        self.max_concurrent_requests = max(1, min(configured, physical_cores))
 
-        # 同時処理数を増やす（libvipsの高速処理を活かすため）
-        # TODO: Consider making this configurable
-        self.max_concurrent_requests = 8
+        # サムネイル生成パラメータはリクエストごとに設定から組み立てず、共有する
+        # (フォルダを読み込むたびに読み直す)
+        self._thumb_params = UnifiedThumbnailWorker.load_generation_params()
 
         logger.debug("EnhancedImageLoader initialized.")
 
@@ -84,6 +105,8 @@ class EnhancedImageLoader(QObject):
         logger.info(f"Loading images from folder: {folder_path}")
         # 既存の画像をクリア (clear内でdata_changedが発行される)
         self.image_model.clear()
+        # 設定の変更を反映するため、生成パラメータをここで読み直す
+        self._thumb_params = UnifiedThumbnailWorker.load_generation_params()
 
         # タスクカウンターをリセット
         self.completed_tasks = 0
@@ -157,16 +180,40 @@ class EnhancedImageLoader(QObject):
             size (QSize): 生成するサムネイルのサイズ
             priority (int, optional): 優先度 (大きいほど優先)
         """
-        if not image_path or not os.path.exists(image_path):
-             logger.warning(f"Invalid or non-existent image path requested: {image_path}")
+        if not self._is_gui_thread():
+            return
+        # パスはスキャナーが列挙したものなので、ここでは存在確認 (stat) を行わない。
+        # 存在しないファイルはワーカー側のエラーとして非同期に通知される
+        if not image_path:
+             logger.warning(f"Invalid image path requested: {image_path!r}")
              # Emit error or just ignore? Ignoring for now.
              # self.thumbnail_created.emit(image_path, QPixmap()) # Emit empty pixmap?
              return
 
+        # QSize はここで1回だけタプルに変換し、以降の比較やキーにはタプルを使う
         thumbnail_size_tuple = (size.width(), size.height())
         logger.debug(f"Thumbnail requested: {image_path} size {thumbnail_size_tuple} priority {priority}")
 
-        # まずはキャッシュをチェック
+        request_key = (image_path, thumbnail_size_tuple)
+
+        # 処理中・処理待ちの状態は自前の辞書で O(1) で判定できるため、キャッシュより先に調べる
+        # (スクロール中に同じリクエストが繰り返し届いても、キャッシュのロック・キー生成・ディスク確認を行わない)
+        if request_key in self.active_requests:
+            logger.debug(f"Request already active: {request_key}")
+            return
+
+        entry = self._pending_index.get(image_path, {}).get(thumbnail_size_tuple)
+        if entry is not None:
+            request = entry[3]
+            # Update priority if higher (古いエントリは無効化して積み直す)
+            if priority > request.priority:
+                entry[4] = False
+                request.priority = priority
+                self._push_pending(request_key, request)
+                logger.debug(f"Updated priority for pending request: {request_key}")
+            return
+
+        # 未登録のリクエストのみキャッシュをチェック
         cached_thumbnail = self.thumbnail_cache.get_thumbnail(image_path, thumbnail_size_tuple)
 
         if cached_thumbnail and not cached_thumbnail.isNull():
@@ -174,103 +221,240 @@ class EnhancedImageLoader(QObject):
             logger.debug(f"Cache hit for: {image_path}")
             self.thumbnail_created.emit(image_path, cached_thumbnail)
             return
-        else:
-             logger.debug(f"Cache miss for: {image_path}")
 
+        logger.debug(f"Cache miss for: {image_path}")
+        self._push_pending(request_key, ThumbnailRequest(image_path, thumbnail_size_tuple, priority))
+        logger.debug(f"Added new pending request: {request_key}")
 
-        # キャッシュになければリクエストを追加 (using QMutex for thread safety)
-        # self.request_mutex.lock() # Locking seems unnecessary if called from main thread only
-        # try:
-        request_key = (image_path, thumbnail_size_tuple)
+        # リクエスト処理を開始
+        self._process_next_request()
 
-        # Check if already active
-        if request_key in self.active_requests:
-            logger.debug(f"Request already active: {request_key}")
-            # Optionally update priority if needed
-            return
+    def _is_gui_thread(self):
+        """
+        リクエストの管理がこのオブジェクトのスレッド (GUIスレッド) から行われているかを確認
 
-        # Check pending requests and update priority or add new
-        found_pending = False
-        for i, req in enumerate(self.pending_requests):
-            # Check both path and size object (QSize comparison works)
-            if req.image_path == image_path and req.size == size:
-                # Update priority if higher
-                if priority > req.priority:
-                    self.pending_requests[i].priority = priority
-                    # Re-sort pending requests based on new priority
-                    self.pending_requests.sort(key=lambda r: -r.priority)
-                    logger.debug(f"Updated priority for pending request: {request_key}")
-                found_pending = True
-                break
-
-        if not found_pending:
-            request = ThumbnailRequest(image_path, size, priority)
-            self.pending_requests.append(request)
-            # Sort after adding new request
-            self.pending_requests.sort(key=lambda r: -r.priority)
-            logger.debug(f"Added new pending request: {request_key}")
-
-        # finally:
-        #     self.request_mutex.unlock()
+        Returns:
+            bool: このオブジェクトのスレッドから呼ばれた場合はTrue (それ以外はエラーを記録してFalse)
+        """
+        if QThread.currentThread() == self.thread():
+            return True
+        logger.error("EnhancedImageLoader must be used from its own thread; request ignored")
+        return False
 
-        # リクエスト処理を開始
-        self._process_next_request()
+    def _push_pending(self, request_key, request):
+        """
+        処理待ちリクエストをヒープに追加
+
+        Args:
+            request_key (tuple): リクエストキー (image_path, size_tuple)
+            request (ThumbnailRequest): リクエスト
+        """
+        entry = [-request.priority, next(self._request_seq), request_key, request, True]
+        heapq.heappush(self.pending_requests, entry)
+        self._pending_index.setdefault(request_key[0], {})[request_key[1]] = entry
+
+    def _pop_pending(self):
+        """
+        最も優先度の高い処理待ちリクエストを取り出す
+
+        Returns:
+            ThumbnailRequest or None: リクエスト（処理待ちがない場合はNone）
+        """
+        while self.pending_requests:
+            entry = heapq.heappop(self.pending_requests)
+            if not entry[4]:
+                continue # 優先度の更新などで無効化されたエントリ
+            image_path, size_tuple = entry[2]
+            same_path = self._pending_index[image_path]
+            del same_path[size_tuple]
+            if not same_path:
+                del self._pending_index[image_path]
+            return entry[3]
+        return None
+
+    def _take_pending_for_path(self, image_path):
+        """
+        同じ画像の処理待ちリクエストをすべて取り出す
+
+        Args:
+            image_path (str): 画像のパス
+
+        Returns:
+            list: ThumbnailRequest のリスト
+        """
+        entries = self._pending_index.pop(image_path, None)
+        if not entries:
+            return []
+        for entry in entries.values():
+            entry[4] = False # ヒープ上のエントリは取り出し時に読み飛ばす
+        return [entry[3] for entry in entries.values()]
+
+    def _schedule_process(self):
+        """
+        次のリクエストの処理をイベントループに予約
+
+        ワーカーの完了が続いても予約は常に1つだけにし、
+        実行時に空きがある分だけまとめてリクエストを処理する。
+        """
+        if self._process_scheduled:
+            return
+        self._process_scheduled = True
+        QTimer.singleShot(0, self._run_scheduled_process)
+
+    def _run_scheduled_process(self):
+        """予約された処理を実行し、同時処理数の上限まで続けてリクエストを処理"""
+        self._process_scheduled = False
+        while self._process_next_request():
+            pass
 
     def _process_next_request(self):
-        """次のサムネイルリクエストを処理"""
+        """
+        次のサムネイルリクエストを処理
+
+        Returns:
+            bool: リクエストを1つ取り出した場合はTrue（続けて呼び出してよい）
+        """
+        if not self._is_gui_thread():
+            return False
         # Check active requests limit
         if len(self.active_requests) >= self.max_concurrent_requests:
             logger.debug(f"Max concurrent thumbnail workers reached ({len(self.active_requests)}). Waiting.")
-            return
+            return False
 
-        # Get next request (using QMutex for safety, although likely overkill if only called from main thread)
-        # self.request_mutex.lock()
-        # try:
-        if not self.pending_requests:
+        # Get next request
+        request = self._pop_pending()
+        if request is None:
             logger.debug("No pending thumbnail requests.")
-            return
+            return False
 
-        request = self.pending_requests.pop(0)
-        request_key = (request.image_path, (request.size.width(), request.size.height()))
+        request_key = (request.image_path, request.size)
 
         # Double check if already active (might happen in rare race conditions without proper locking)
         if request_key in self.active_requests:
              logger.warning(f"Request {request_key} somehow became active before processing. Skipping.")
-             # QTimer.singleShot(0, self._process_next_request) # Try next immediately
-             return
+             return True
 
+        # 同じ画像の別サイズのリクエストもまとめて取り出し、原画像のデコードを1回にする
+        sibling_requests = self._take_pending_for_path(request.image_path)
+        if sibling_requests:
+            self._start_batch_request(request, sibling_requests)
+            return True
 
         # Add to active requests
         self.active_requests.add(request_key)
-        # finally:
-        #     self.request_mutex.unlock()
 
         logger.debug(f"Processing request: {request_key}")
 
-        # Use UnifiedThumbnailWorker
-        worker = UnifiedThumbnailWorker(request.image_path, request.size, self.thumbnail_cache)
-
-        # Connect signals with lambda to pass the request key
-        worker.signals.result.connect(lambda result, rk=request_key: self.on_thumbnail_created(result, rk))
-        worker.signals.error.connect(lambda error, rk=request_key: self.on_thumbnail_error(error, rk))
+        # Use UnifiedThumbnailWorker (IDはここで1回だけ組み立て、ワーカー側の既定IDの生成を省く)
+        # IDは一意であればよいのでフルパスをそのまま使う (basename の分割を省き、
+        # サブフォルダ内の同名ファイルのワーカーが互いをキャンセルしないようにする)
+        worker_id = f"thumbnail_{request.image_path}_{request.size[0]}x{request.size[1]}"
+        worker = UnifiedThumbnailWorker(request.image_path, request.size, self.thumbnail_cache,
+                                        worker_id=worker_id, params=self._thumb_params)
+
+        # Connect signals with functools.partial to pass the request key
+        # (キュー接続で完了処理を常にGUIスレッドで実行し、リクエストの管理をロックなしで行う。
+        #  partial ならPySideが受信側のオブジェクトを認識でき、ローダーの破棄時に接続も外れる)
+        worker.signals.result.connect(functools.partial(self.on_thumbnail_created, request_key=request_key),
+                                      Qt.ConnectionType.QueuedConnection)
+        worker.signals.error.connect(functools.partial(self.on_thumbnail_error, request_key=request_key),
+                                     Qt.ConnectionType.QueuedConnection)
         # No need to connect finished if WorkerManager handles it
 
-        worker_id = f"thumbnail_{os.path.basename(request.image_path)}_{request.size.width()}x{request.size.height()}" # Use os.path.basename
         if not self.worker_manager.start_worker(worker_id, worker, request.priority): # Pass priority
              logger.error(f"Failed to start thumbnail worker for {request_key}")
              self.active_requests.discard(request_key) # Remove from active if start fails
+             self._release_unstarted_worker(worker)
+             self.error_occurred.emit(f"サムネイルワーカーの起動に失敗: {request.image_path}")
+        return True
+
+
+    def _start_batch_request(self, request, sibling_requests):
+        """
+        同じ画像の複数サイズのリクエストを1つのワーカーで処理
+
+        Args:
+            request (ThumbnailRequest): 先頭のリクエスト
+            sibling_requests (list): 同じ画像の別サイズのリクエスト
+        """
+        request_keys = []
+        for req in [request] + sibling_requests:
+            request_key = (req.image_path, req.size)
+            if request_key not in self.active_requests and request_key not in request_keys:
+                request_keys.append(request_key)
+        if not request_keys:
+            return
+
+        self.active_requests.update(request_keys)
+        sizes = [size_tuple for _, size_tuple in request_keys]
+        logger.debug(f"Processing batched request: {request.image_path} sizes {sizes}")
+
+        size_label = "_".join(f"{width}x{height}" for width, height in sizes)
+        worker_id = f"thumbnail_{request.image_path}_{size_label}"
+        worker = BatchThumbnailWorker(request.image_path, sizes, self.thumbnail_cache,
+                                      worker_id=worker_id, params=self._thumb_params)
+        worker.signals.result.connect(functools.partial(self.on_thumbnails_created, request_keys=request_keys),
+                                      Qt.ConnectionType.QueuedConnection)
+        worker.signals.error.connect(functools.partial(self.on_thumbnails_error, request_keys=request_keys),
+                                     Qt.ConnectionType.QueuedConnection)
+
+        if not self.worker_manager.start_worker(worker_id, worker, request.priority):
+             logger.error(f"Failed to start batch thumbnail worker for {request.image_path}")
+             self.active_requests.difference_update(request_keys)
+             self._release_unstarted_worker(worker)
              self.error_occurred.emit(f"サムネイルワーカーの起動に失敗: {request.image_path}")
-             QTimer.singleShot(0, self._process_next_request) # Try next
 
+    def _release_unstarted_worker(self, worker):
+        """
+        起動に失敗したワーカーの接続を外し、参照が残らないようにする
+
+        Args:
+            worker (BaseWorker): 起動に失敗したワーカー
+        """
+        for signal in (worker.signals.result, worker.signals.error):
+            try:
+                signal.disconnect()
+            except (RuntimeError, TypeError):
+                pass # 接続がない場合
+        worker.signals.deleteLater()
+
+    def on_thumbnails_created(self, result, request_keys):
+        """
+        複数サイズのサムネイル生成完了時の処理
+
+        Args:
+            result (tuple): (image_path, [(size_tuple, thumbnail), ...]) のタプル
+            request_keys (list): 処理したリクエストキーのリスト
+        """
+        image_path, thumbnails = result
+        for size_tuple, thumbnail in thumbnails:
+            self.on_thumbnail_created((image_path, thumbnail), (image_path, size_tuple), process_next=False)
+        self.active_requests.difference_update(request_keys)
+        self._schedule_process()
+
+    def on_thumbnails_error(self, error, request_keys):
+        """
+        複数サイズのサムネイル生成エラー時の処理
+
+        Args:
+            error (str): エラーメッセージ
+            request_keys (list): 処理したリクエストキーのリスト
+        """
+        logger.error(f"Batched thumbnail generation error for {request_keys}: {error}")
+        if request_keys:
+            self.error_occurred.emit(f"サムネイル生成エラー ({request_keys[0][0]}): {error}")
+        self.active_requests.difference_update(request_keys)
+        self._schedule_process()
 
     @Slot(tuple, tuple) # result is (str, QPixmap), request_key is (str, tuple)
-    def on_thumbnail_created(self, result, request_key):
+    def on_thumbnail_created(self, result, request_key, process_next=True):
         """
         サムネイル生成完了時の処理
 
         Args:
             result (tuple): (image_path, thumbnail) のタプル
             request_key (tuple): Processed request key (image_path, size_tuple)
+            process_next (bool): 次のリクエストの処理を予約するかどうか
         """
         image_path, thumbnail = result
         logger.debug(f"Thumbnail created for: {request_key}")
@@ -289,7 +473,8 @@ class EnhancedImageLoader(QObject):
         self.active_requests.discard(request_key)
 
         # 次のリクエストを処理
-        QTimer.singleShot(0, self._process_next_request) # Use QTimer for safety
+        if process_next:
+            self._schedule_process()
 
     @Slot(str, tuple) # error is str, request_key is (str, tuple)
     def on_thumbnail_error(self, error, request_key):
@@ -312,7 +497,7 @@ class EnhancedImageLoader(QObject):
         self.active_requests.discard(request_key)
 
         # 次のリクエストを処理
-        QTimer.singleShot(0, self._process_next_request) # Use QTimer for safety
+        self._schedule_process()
 
     @Slot(str) # Slot for directory scanner errors
     def handle_scan_error(self, error_message):
@@ -4,15 +4,19 @@
 
 PILとlibvipsを両方サポートし、自動的に最適な方法でサムネイルを生成する
 高性能ワーカークラスを提供します。
+
+PILエンジンの縮小処理は、Pillowの代わりに Pillow-SIMD (pip install pillow-simd) を
+インストールするとコードの変更なしでSIMD化されます。
 """
 import os
+import struct
 import time
-from io import BytesIO
-from typing import Tuple, Optional, Dict, Any, Union
+import functools
+from typing import Tuple, Optional, Dict, Any, Union, List, Sequence
 import threading
 
 from PySide6.QtCore import Qt, Slot, QSize
-from PySide6.QtGui import QPixmap, QImage
+from PySide6.QtGui import QPixmap, QImage, QImageReader, QImageIOHandler
 
 from .workers import BaseWorker, CancellationError
 from utils import logger, get_config
@@ -23,8 +27,16 @@ try:
     # PIL の切り捨てエラーを防止
     ImageFile.LOAD_TRUNCATED_IMAGES = True
     HAS_PIL = True
+    # どのビルドのPillowが使われているかを記録 (Pillow-SIMDはバージョンに ".post" が付く)
+    import PIL
+    HAS_PIL_SIMD = ".post" in PIL.__version__
+    if HAS_PIL_SIMD:
+        logger.debug(f"Pillow {PIL.__version__} (SIMD)")
+    else:
+        logger.info(f"Pillow {PIL.__version__} を使用します。Pillow-SIMDを使うとPILでの縮小が高速になります。")
 except ImportError:
     HAS_PIL = False
+    HAS_PIL_SIMD = False
     logger.warning("PILがインストールされていません。PILベースの処理は無効化されます。")
 
 # libvipsをインポート（オプション）
@@ -36,6 +48,161 @@ except ImportError:
     HAS_VIPS = False
     logger.warning("libvipsがインストールされていません。高速処理は無効化されます。")
 
+_vips_warmed_up = False
+
+# エラー時のプレースホルダー (サイズごとに1つを共有し、失敗が続いても画像を作り直さない)
+_error_placeholders: Dict[Tuple[int, int], QPixmap] = {}
+_error_placeholders_lock = threading.Lock()
+
+def warm_up_vips() -> None:
+    """
+    libvipsを事前に初期化する
+
+    最初の処理で発生する初期化（スレッドプールや操作キャッシュの作成など）を
+    前もって済ませ、バッチの最初のサムネイルが遅くならないようにします。
+    何度呼んでも初期化は1回だけ行われます。
+    """
+    global _vips_warmed_up
+    if _vips_warmed_up or not HAS_VIPS:
+        return
+    _vips_warmed_up = True
+    try:
+        # 小さな画像で縮小処理を実行し、パイプラインを実際に評価させる
+        pyvips.Image.black(8, 8).thumbnail_image(1).write_to_memory()
+        logger.debug("libvipsのウォームアップが完了しました")
+    except Exception as e:
+        logger.warning(f"libvipsのウォームアップに失敗しました: {e}")
+
+
+# JPEGのSOFマーカー (DHT=C4, JPG=C8, DAC=CC はSOFではない)
+_JPEG_SOF_MARKERS = frozenset(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+
+
+def _fast_probe_size(image_path: str) -> Optional[Tuple[int, int]]:
+    """
+    主要な形式 (PNG/JPEG/GIF/WebP/BMP) のヘッダーを直接解析してサイズを取得する
+
+    デコーダーを使わずに先頭の数十バイト (JPEGはマーカー部分) だけを読みます。
+    解析できない形式や壊れたヘッダーの場合はNoneを返し、呼び出し側でlibvips/PIL/Qtを使います。
+
+    Args:
+        image_path: 画像のパス
+
+    Returns:
+        (width, height): 画像のサイズ、またはNone
+    """
+    try:
+        with open(image_path, 'rb') as f:
+            head = f.read(32)
+            if head.startswith(b'\x89PNG\r\n\x1a\n') and head[12:16] == b'IHDR':
+                width, height = struct.unpack('>II', head[16:24])
+            elif head[:6] in (b'GIF87a', b'GIF89a'):
+                width, height = struct.unpack('<HH', head[6:10])
+            elif head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+                chunk = head[12:16]
+                if chunk == b'VP8X':
+                    width = int.from_bytes(head[24:27], 'little') + 1
+                    height = int.from_bytes(head[27:30], 'little') + 1
+                elif chunk == b'VP8L' and head[20] == 0x2F:
+                    bits = int.from_bytes(head[21:25], 'little')
+                    width = (bits & 0x3FFF) + 1
+                    height = ((bits >> 14) & 0x3FFF) + 1
+                elif chunk == b'VP8 ':
+                    frame = head[20:30]
+                    if frame[3:6] != b'\x9d\x01\x2a':
+                        return None
+                    width, height = struct.unpack('<HH', frame[6:10])
+                    width &= 0x3FFF
+                    height &= 0x3FFF
+                else:
+                    return None
+            elif head[:2] == b'BM' and struct.unpack('<I', head[14:18])[0] >= 40:
+                width, height = struct.unpack('<ii', head[18:26])
+                height = abs(height) # 負の高さはトップダウン形式
+            elif head[:3] == b'\xff\xd8\xff':
+                # JPEGはSOFマーカーまでセグメントを読み飛ばす (EXIFが大きい場合があるため長さで移動する)
+                f.seek(2)
+                while True:
+                    marker = f.read(2)
+                    while marker[:1] == b'\xff' and marker[1:2] == b'\xff': # パディング
+                        marker = marker[1:] + f.read(1)
+                    if len(marker) < 2 or marker[0] != 0xFF:
+                        return None
+                    code = marker[1]
+                    if code == 0xD8 or 0xD0 <= code <= 0xD7: # 長さを持たないマーカー
+                        continue
+                    if code in (0xD9, 0xDA): # SOFより先に画像データに到達した
+                        return None
+                    segment = f.read(2)
+                    if len(segment) < 2:
+                        return None
+                    length = struct.unpack('>H', segment)[0]
+                    if code in _JPEG_SOF_MARKERS:
+                        frame = f.read(5)
+                        if len(frame) < 5:
+                            return None
+                        height, width = struct.unpack('>HH', frame[1:5])
+                        break
+                    f.seek(length - 2, os.SEEK_CUR)
+            else:
+                return None
+    except (OSError, struct.error, IndexError):
+        return None
+    if width <= 0 or height <= 0:
+        return None
+    return (width, height)
+
+
+@functools.lru_cache(maxsize=8192)
+def _probe_image_size(image_path: str, mtime_ns: int) -> Optional[Tuple[int, int]]:
+    """
+    画像のヘッダーだけを読んでサイズを取得する（結果はプロセス内で共有）
+
+    更新時刻をキーに含めるため、ファイルが変更された場合は読み直されます。
+    再スクロールや再スキャンでは同じ画像のヘッダーを何度も読まずに済みます。
+
+    Args:
+        image_path: 画像のパス
+        mtime_ns: ファイルの更新時刻 (ナノ秒)。キャッシュのキーとしてのみ使う
+
+    Returns:
+        (width, height): 画像のサイズ、またはNone
+    """
+    # 主要な形式はヘッダーを直接解析する (デコーダーの初期化やファイルの再読み込みが不要)
+    fast_size = _fast_probe_size(image_path)
+    if fast_size is not None:
+        return fast_size
+
+    # Try VIPS if the format is not handled above (often fastest for just size)
+    if HAS_VIPS:
+        try:
+            # access='sequential' ではヘッダーのみ読み、ピクセルはデコードしない
+            img_vips = pyvips.Image.new_from_file(image_path, access='sequential', fail=True)
+            return (img_vips.width, img_vips.height)
+        except pyvips.Error as vips_e:
+            logger.debug(f"VIPS failed to get size for {image_path}: {vips_e} (trying other methods)")
+        except Exception as e:
+            logger.warning(f"Unexpected error getting size via VIPS for {image_path}: {e}")
+
+    # Try PIL if VIPS failed or unavailable (Image.open はヘッダーのみ読む)
+    if HAS_PIL:
+        try:
+            with Image.open(image_path) as img:
+                return img.size # (width, height)
+        except UnidentifiedImageError:
+            logger.debug(f"PIL could not identify image format for {image_path}")
+        except Exception as e:
+            logger.warning(f"Error getting size via PIL for {image_path}: {e}")
+
+    # Qt は QImage(path) だと全体をデコードするため、QImageReader でヘッダーだけを読む
+    reader = QImageReader(image_path)
+    size = reader.size()
+    if size.isValid():
+        return (size.width(), size.height())
+    logger.debug(f"Qt could not read image size for {image_path}: {reader.errorString()}")
+    return None
+
+
 class UnifiedThumbnailWorker(BaseWorker):
     """
     統合サムネイル生成ワーカークラス
@@ -47,8 +214,6 @@ class UnifiedThumbnailWorker(BaseWorker):
     # SUPPORTED_FORMATS = ['.jpg', '.jpeg', '.png', '.gif', '.bmp', '.webp', '.tiff', '.tif']
 
     # デフォルト設定 (Read from config)
-    DEFAULT_WEBP_QUALITY = 85
-    DEFAULT_JPEG_QUALITY = 90
     DEFAULT_USE_VIPS = True
     DEFAULT_FALLBACK_TO_QT = True
     DEFAULT_SIZE_THRESHOLD = 4096 # Default threshold from config.py
@@ -57,9 +222,29 @@ class UnifiedThumbnailWorker(BaseWorker):
     ENGINE_QT = "qt"
     ENGINE_PIL = "pil"
     ENGINE_VIPS = "vips"
+    # エンジンごとの生成メソッド名と進捗表示
+    ENGINE_METHODS = {
+        ENGINE_QT: "_generate_with_qt",
+        ENGINE_PIL: "_generate_with_pil",
+        ENGINE_VIPS: "_generate_with_vips",
+    }
+    ENGINE_PROGRESS_TEXT = {
+        ENGINE_QT: "Qtで処理中...",
+        ENGINE_PIL: "PILで処理中...",
+        ENGINE_VIPS: "libvipsで処理中...",
+    }
+
+    # PILで縮小する際、この大きさ以下のサムネイルはLANCZOSではなくBILINEARを使う
+    # (小さなサムネイルでは見た目の差がなく、リサンプリングが大幅に速い)
+    PIL_BILINEAR_MAX_SIZE = 128
+    # preferred_resample で指定できるPILの縮小フィルタ (Image.Resampling の名前)
+    # hamming は lanczos より軽く、大きく縮小する場合は見た目の差もほとんどない
+    PIL_RESAMPLE_NAMES = ("lanczos", "bicubic", "hamming")
 
     def __init__(self, image_path: str, size: Union[Tuple[int, int], QSize],
-                 thumbnail_cache=None, use_vips: bool = None, worker_id: str = None):
+                 thumbnail_cache=None, use_vips: bool = None, worker_id: str = None,
+                 cancel_event: Optional[threading.Event] = None,
+                 params: Optional[Dict[str, Any]] = None):
         """
         初期化
 
@@ -69,13 +254,18 @@ class UnifiedThumbnailWorker(BaseWorker):
             thumbnail_cache: サムネイルキャッシュ（オプション）
             use_vips: libvipsを使用するかどうか (Noneの場合は設定から自動判定)
             worker_id: ワーカーの識別子（オプション）
+            cancel_event: 共有キャンセルイベント（オプション、BatchProcessorなどが使用）
+            params: load_generation_params() で生成したパラメータ（オプション）
+                    同じ設定で多数のワーカーを作成する場合に、設定の読み込みを1回にまとめるために使用
         """
         # Generate worker_id based on path and size for better identification
-        size_tuple = size if isinstance(size, tuple) else (size.width(), size.height())
-        # Ensure worker_id doesn't contain invalid characters for filenames if used as such
-        safe_basename = os.path.basename(image_path).replace(" ", "_").replace(":", "_")
-        worker_id = worker_id or f"thumb_{safe_basename}_{size_tuple[0]}x{size_tuple[1]}"
-        super().__init__(worker_id)
+        # (only when the caller did not supply one, e.g. BatchProcessor passes its own id)
+        if not worker_id:
+            size_tuple = size if isinstance(size, tuple) else (size.width(), size.height())
+            # Ensure worker_id doesn't contain invalid characters for filenames if used as such
+            safe_basename = os.path.basename(image_path).replace(" ", "_").replace(":", "_")
+            worker_id = f"thumb_{safe_basename}_{size_tuple[0]}x{size_tuple[1]}"
+        super().__init__(worker_id, cancel_event=cancel_event)
 
         self.image_path = image_path
 
@@ -87,25 +277,24 @@ class UnifiedThumbnailWorker(BaseWorker):
 
         self.thumbnail_cache = thumbnail_cache
 
-        # 設定から値を取得
-        config = get_config()
-        gen_config = config.get("thumbnails.generation", {})
-        self.webp_quality = gen_config.get("webp_quality", self.DEFAULT_WEBP_QUALITY)
-        self.jpeg_quality = gen_config.get("jpeg_quality", self.DEFAULT_JPEG_QUALITY)
+        # 設定から値を取得 (共有パラメータが渡された場合は設定を読まない)
+        if params is None:
+            params = self.load_generation_params()
 
         # VIPSを使用するかどうか
         if use_vips is None:
-            self.use_vips = gen_config.get("use_vips", self.DEFAULT_USE_VIPS) and HAS_VIPS
+            self.use_vips = params["use_vips"]
         else:
             # Allow override, but still check if HAS_VIPS
             self.use_vips = use_vips and HAS_VIPS
 
-        self.fallback_to_qt = gen_config.get("fallback_to_qt", self.DEFAULT_FALLBACK_TO_QT)
+        self.fallback_to_qt = params["fallback_to_qt"]
         # Use max_size_for_direct as size threshold for VIPS vs PIL/Qt
-        self.size_threshold = gen_config.get("max_size_for_direct", self.DEFAULT_SIZE_THRESHOLD)
-        self.use_lanczos = gen_config.get("use_lanczos", True)
-        self.strip_metadata = gen_config.get("strip_metadata", True)
-        self.thumbnail_algorithm = gen_config.get("thumbnail_algorithm", "thumbnail") # 'thumbnail' or 'resize'
+        self.size_threshold = params["size_threshold"]
+        self.prefer_vips = params["prefer_vips"]
+        self.use_lanczos = params["use_lanczos"]
+        self.preferred_resample = params["preferred_resample"]
+        self.use_jpeg_draft = params["use_jpeg_draft"]
 
         # 画像情報
         self.image_width = 0
@@ -113,12 +302,32 @@ class UnifiedThumbnailWorker(BaseWorker):
         self.image_format = ""
         self.engine_used = ""
 
-        # スレッドセーフなロック（PIL/VIPSライブラリ自体がスレッドセーフか要確認だが念のため）
-        # Using RLock for potential reentrant calls within generation methods if needed
-        self.image_lock = threading.RLock()
-
         logger.debug(f"Worker {self.worker_id} initialized for {os.path.basename(image_path)}, Size={self.size}, UseVIPS={self.use_vips}")
 
+    @classmethod
+    def load_generation_params(cls) -> Dict[str, Any]:
+        """
+        設定からサムネイル生成パラメータを読み込む
+
+        結果は読み取り専用として扱い、同じ設定で作成する複数のワーカーで共有できます。
+
+        Returns:
+            dict: サムネイル生成パラメータ
+        """
+        gen_config = get_config().get("thumbnails.generation", {})
+        return {
+            "use_vips": gen_config.get("use_vips", cls.DEFAULT_USE_VIPS) and HAS_VIPS,
+            # Trueの場合は画像サイズに関係なくlibvips (shrink-on-load) を使う
+            # (PIL/Qtは原寸でデコードしてから縮小するため、libvipsが使える場合は既定で優先する)
+            "prefer_vips": gen_config.get("prefer_vips", True),
+            "fallback_to_qt": gen_config.get("fallback_to_qt", cls.DEFAULT_FALLBACK_TO_QT),
+            "size_threshold": gen_config.get("max_size_for_direct", cls.DEFAULT_SIZE_THRESHOLD),
+            "use_lanczos": gen_config.get("use_lanczos", True),
+            "preferred_resample": cls._resolve_resample_name(gen_config.get("preferred_resample", "lanczos")),
+            # PILでJPEGをDCTスケーリングで縮小読み込みするか (まれに画質に影響する場合は無効化できる)
+            "use_jpeg_draft": gen_config.get("use_jpeg_draft", True),
+        }
+
     @Slot()
     def work(self) -> Tuple[str, QPixmap]:
         """
@@ -148,17 +357,8 @@ class UnifiedThumbnailWorker(BaseWorker):
                  logger.warning(f"Cache check error for {self.worker_id}: {cache_e}")
                  # Proceed with generation if cache check fails
 
-        # 画像が存在するか確認
-        if not os.path.exists(self.image_path):
-            logger.warning(f"Image file not found: {self.image_path} ({self.worker_id})")
-            # Return path and an empty/error pixmap
-            return (self.image_path, self._create_error_placeholder("File Not Found"))
-
-        # 拡張子をチェック (Informational)
-        ext = os.path.splitext(self.image_path.lower())[1]
-        if not ext:
-            logger.debug(f"Image has no extension: {self.image_path} ({self.worker_id})")
-            # Continue trying to load it
+        # 画像の存在確認 (stat) は事前には行わない。パスはスキャナーが列挙したもので通常は存在し、
+        # 存在しない場合は各エンジンの読み込みが失敗するため、失敗時にだけ原因を確認する
 
         self.update_progress(10, "画像を分析中...")
         pixmap = None # Initialize pixmap result
@@ -167,38 +367,35 @@ class UnifiedThumbnailWorker(BaseWorker):
         try:
             # 最適な生成方法を判断
             use_engine = self._determine_best_engine()
-            final_engine = use_engine # Store the initially chosen engine
-
-            # 選択されたエンジンでサムネイルを生成
-            logger.debug(f"Attempting generation with engine: {use_engine} for {self.worker_id}")
-            if use_engine == self.ENGINE_VIPS:
-                self.update_progress(20, "libvipsで処理中...")
-                pixmap = self._generate_with_vips()
-            elif use_engine == self.ENGINE_PIL:
-                self.update_progress(20, "PILで処理中...")
-                pixmap = self._generate_with_pil()
-            else: # Fallback to Qt
-                self.update_progress(20, "Qtで処理中...")
-                pixmap = self._generate_with_qt()
-
-            # Check if generation failed with the chosen engine
-            if pixmap is None or pixmap.isNull():
-                logger.warning(f"Thumbnail generation failed with engine {use_engine} for {self.worker_id}")
-
-                # Try fallback engines if configured and initial engine wasn't Qt
-                if use_engine != self.ENGINE_QT and self.fallback_to_qt:
-                    logger.info(f"Falling back to Qt engine for {self.worker_id}")
-                    final_engine = self.ENGINE_QT
-                    pixmap = self._generate_with_qt()
-                elif use_engine != self.ENGINE_PIL and HAS_PIL: # Try PIL if VIPS/Qt failed
-                     logger.info(f"Falling back to PIL engine for {self.worker_id}")
-                     final_engine = self.ENGINE_PIL
-                     pixmap = self._generate_with_pil()
+
+            # 試すエンジンの順序 (選択したエンジン → 設定に応じたフォールバック) を先に決めておく
+            engines = [use_engine]
+            if use_engine != self.ENGINE_QT and self.fallback_to_qt:
+                engines.append(self.ENGINE_QT)
+            elif use_engine != self.ENGINE_PIL and HAS_PIL: # Try PIL if VIPS/Qt failed
+                engines.append(self.ENGINE_PIL)
+
+            # 各エンジンは失敗時にNoneを返す (例外はエンジン内で記録済み。キャンセルのみ伝播する)
+            for engine in engines:
+                if engine != use_engine:
+                    logger.info(f"Falling back to {engine} engine for {self.worker_id}")
+                logger.debug(f"Attempting generation with engine: {engine} for {self.worker_id}")
+                self.update_progress(20, self.ENGINE_PROGRESS_TEXT[engine])
+                pixmap = getattr(self, self.ENGINE_METHODS[engine])()
+                if pixmap is not None and not pixmap.isNull():
+                    final_engine = engine
+                    break
+                logger.warning(f"Thumbnail generation failed with engine {engine} for {self.worker_id}")
+                pixmap = None
 
             # If still failed after fallbacks, use placeholder
-            if pixmap is None or pixmap.isNull():
-                 logger.error(f"All generation attempts failed for {self.worker_id}")
-                 pixmap = self._create_error_placeholder("Generation Failed")
+            if pixmap is None:
+                 if not os.path.exists(self.image_path):
+                     logger.warning(f"Image file not found: {self.image_path} ({self.worker_id})")
+                     pixmap = self._create_error_placeholder("File Not Found")
+                 else:
+                     logger.error(f"All generation attempts failed for {self.worker_id}")
+                     pixmap = self._create_error_placeholder("Generation Failed")
                  final_engine = "placeholder"
 
             self.engine_used = final_engine # Record the engine that produced the final result
@@ -208,7 +405,7 @@ class UnifiedThumbnailWorker(BaseWorker):
                 self.update_progress(90, "キャッシュに保存中...")
                 try:
                      # Ensure the stored thumbnail is not the error placeholder
-                     if not pixmap.property("isErrorPlaceholder"): # Check for custom property if set
+                     if not self._is_error_placeholder(pixmap):
                           self.thumbnail_cache.store_thumbnail(self.image_path, self.size, pixmap)
                      else:
                           logger.debug(f"Skipping cache store for error placeholder: {self.worker_id}")
@@ -243,6 +440,11 @@ class UnifiedThumbnailWorker(BaseWorker):
         Returns:
             str: 使用するエンジンのタイプ ('vips', 'pil', 'qt')
         """
+        # libvipsを優先する場合は画像サイズの事前取得 (ファイルのオープン) も省く
+        if self.prefer_vips and self.use_vips and HAS_VIPS:
+            logger.debug(f"Using VIPS (preferred): {self.worker_id}")
+            return self.ENGINE_VIPS
+
         # Get image size (might be cached from previous call if any)
         if self.image_width == 0 or self.image_height == 0:
              img_size = self._get_image_size()
@@ -275,106 +477,85 @@ class UnifiedThumbnailWorker(BaseWorker):
 
     def _get_image_size(self) -> Optional[Tuple[int, int]]:
         """
-        画像サイズを取得（可能な限り軽量に）
+        画像サイズを取得（ヘッダーのみ読み、結果はパスと更新時刻ごとにキャッシュ）
 
         Returns:
             (width, height): 画像のサイズ、またはNone
         """
-        # Try VIPS first if available (often fastest for just size)
-        if HAS_VIPS:
-             try:
-                  # Use fail=True to catch unsupported formats quickly
-                  # Use access='sequential' for potentially faster header reading
-                  # pyvips.Image.new_from_file can raise an Error exception
-                  img_vips = pyvips.Image.new_from_file(self.image_path, access='sequential', fail=True)
-                  # logger.debug(f"Got size via VIPS for {self.worker_id}")
-                  return (img_vips.width, img_vips.height)
-             except pyvips.Error as vips_e:
-                  logger.debug(f"VIPS failed to get size for {self.worker_id}: {vips_e} (trying other methods)")
-             except Exception as e:
-                  logger.warning(f"Unexpected error getting size via VIPS for {self.worker_id}: {e}")
-
-
-        # Try PIL if VIPS failed or unavailable
-        if HAS_PIL:
-            try:
-                with self.image_lock: # Lock around PIL operations if needed
-                    # Open without loading pixel data using verify() might be faster?
-                    # For now, just open normally.
-                    with Image.open(self.image_path) as img:
-                        # logger.debug(f"Got size via PIL for {self.worker_id}")
-                        return img.size # (width, height)
-            except UnidentifiedImageError:
-                 logger.debug(f"PIL could not identify image format for {self.worker_id}")
-            except Exception as e:
-                logger.warning(f"Error getting size via PIL for {self.worker_id}: {e}")
-
-        # Try Qt as a last resort (might load more data than needed)
         try:
-            qimg_info = QImage(self.image_path)
-            if not qimg_info.isNull():
-                # logger.debug(f"Got size via Qt for {self.worker_id}")
-                return (qimg_info.width(), qimg_info.height())
-            else:
-                 logger.debug(f"Qt could not load image for size info: {self.worker_id}")
-        except Exception as e:
-            logger.warning(f"Error getting size via Qt for {self.worker_id}: {e}")
+            mtime_ns = os.stat(self.image_path).st_mtime_ns
+        except OSError as e:
+            logger.warning(f"Failed to stat image for size info: {self.worker_id}: {e}")
+            return None
 
-        logger.error(f"Failed to determine image size for: {self.worker_id}")
-        return None
+        img_size = _probe_image_size(self.image_path, mtime_ns)
+        if img_size is None:
+            logger.error(f"Failed to determine image size for: {self.worker_id}")
+        return img_size
+
+    @classmethod
+    def _resolve_resample_name(cls, name: Any) -> str:
+        """
+        設定のリサンプリングフィルタ名を検証する
+
+        Args:
+            name: 設定値 ("lanczos", "bicubic", "hamming")
+
+        Returns:
+            str: 有効なフィルタ名。不明な値の場合は "lanczos"
+        """
+        resample = str(name).lower()
+        if resample not in cls.PIL_RESAMPLE_NAMES:
+            logger.warning(f"不明なリサンプリングフィルタ '{name}' が指定されました。lanczosを使用します。")
+            return "lanczos"
+        return resample
 
     def _generate_with_pil(self) -> Optional[QPixmap]:
         """PILを使用してサムネイルを生成"""
         if not HAS_PIL: return None
         logger.debug(f"Generating thumbnail with PIL for {self.worker_id}")
         try:
-            with self.image_lock: # Ensure thread safety for PIL operations if necessary
-                with Image.open(self.image_path) as img:
-                    self.image_format = img.format or ""
-                    self.image_width, self.image_height = img.size # Update size info
-
-                    # Handle potential mode issues (e.g., CMYK, P) before thumbnailing
-                    if img.mode == 'P':
-                         # Convert indexed color to RGBA or RGB
-                         img = img.convert('RGBA')
-                    elif img.mode == 'CMYK':
-                         img = img.convert('RGB')
-                    elif img.mode == 'RGBA' and self.image_format == 'JPEG':
-                         img = img.convert('RGB') # Remove alpha for JPEG
-
-                    self.check_cancelled() # Check cancellation before intensive operation
-                    self.update_progress(40, "サムネイル生成中 (PIL)...")
-
-                    # Use LANCZOS resampling if configured
-                    resample_filter = Image.Resampling.LANCZOS if self.use_lanczos else Image.Resampling.BILINEAR
-                    img.thumbnail(self.size, resample=resample_filter)
-
-                    self.check_cancelled() # Check after thumbnailing
-                    self.update_progress(70, "QPixmapに変換中 (PIL)...")
-
-                    # Convert PIL Image to QPixmap via QImage
-                    # Try to detect format for saving to buffer, default to PNG
-                    buffer_format = "PNG" # Default, supports alpha
-                    img_format_upper = self.image_format.upper() if self.image_format else ""
-
-                    byte_arr = BytesIO()
-                    save_options = {}
-                    if buffer_format == "PNG":
-                         save_options['compress_level'] = 1 # Faster PNG saving
-
-                    img.save(byte_arr, format=buffer_format, **save_options)
-                    byte_arr.seek(0) # Reset buffer position
-
-                    qimg = QImage()
-                    load_ok = qimg.loadFromData(byte_arr.read()) # Read bytes
-
-                    if not load_ok or qimg.isNull():
-                        logger.warning(f"Failed to load QImage from PIL buffer for {self.worker_id}")
-                        return None
+            # ワーカーのインスタンスは1つのスレッドでのみ使われ、扱うのはローカルな画像だけなのでロックは不要
+            with Image.open(self.image_path) as img:
+                self.image_format = img.format or ""
+                self.image_width, self.image_height = img.size # Update size info
+
+                # JPEGはlibjpegのDCTスケーリング (1/2, 1/4, 1/8) で目標サイズ以上の最小サイズに縮小して読み込む
+                # (原寸でデコードしてから縮小するより大幅に速い。原画像のサイズは上で記録済み)
+                if self.use_jpeg_draft and self.image_format in ("JPEG", "MPO"):
+                    img.draft("RGB", self.size)
+
+                # パレット画像はそのままでは最近傍でしか縮小できないため、縮小前に変換する
+                # (CMYK などその他のモードの変換は、縮小後の小さな画像に対して _pil_to_qimage で行う)
+                if img.mode == 'P':
+                     # Convert indexed color to RGBA or RGB
+                     img = img.convert('RGBA')
+
+                self.check_cancelled() # Check cancellation before intensive operation
+                self.update_progress(40, "サムネイル生成中 (PIL)...")
+
+                # Use the configured filter (default LANCZOS) if enabled (小さなサムネイルは常にBILINEAR)
+                if self.use_lanczos and max(self.size) > self.PIL_BILINEAR_MAX_SIZE:
+                    resample_filter = Image.Resampling[self.preferred_resample.upper()]
+                else:
+                    resample_filter = Image.Resampling.BILINEAR
+                img.thumbnail(self.size, resample=resample_filter)
+
+                self.check_cancelled() # Check after thumbnailing
+                self.update_progress(70, "QPixmapに変換中 (PIL)...")
 
-                    pixmap = QPixmap.fromImage(qimg)
-                    logger.debug(f"PIL generation successful for {self.worker_id}")
-                    return pixmap
+                if img.mode == 'RGBA' and self.image_format == 'JPEG':
+                     img = img.convert('RGB') # Remove alpha for JPEG
+
+                # PNGへのエンコード/デコードを経由せず、ピクセルをそのままQImageに渡す
+                qimg = self._pil_to_qimage(img)
+                if qimg is None:
+                    logger.warning(f"Failed to convert PIL image to QImage for {self.worker_id}")
+                    return None
+
+                pixmap = QPixmap.fromImage(qimg)
+                logger.debug(f"PIL generation successful for {self.worker_id}")
+                return pixmap
 
         except UnidentifiedImageError:
             logger.warning(f"PIL could not identify image format: {self.image_path} ({self.worker_id})")
@@ -386,6 +567,35 @@ class UnifiedThumbnailWorker(BaseWorker):
             return None
 
 
+    @staticmethod
+    def _pil_to_qimage(img) -> Optional[QImage]:
+        """
+        PILの画像をメモリ上のピクセルから直接QImageに変換
+
+        Args:
+            img: PIL.Image.Image
+
+        Returns:
+            QImage or None: 変換後の画像。変換できない場合はNone
+        """
+        # 16bitグレースケール (16bit PNG など) はそのまま変換すると飽和するため、上位8bitを使う
+        if img.mode.startswith("I;16") or img.mode == "I":
+            img = img.convert("I").point(lambda value: value * (1 / 256)).convert("L")
+        # QImageに対応する形式がないモード (LA, 1 など) は RGB/RGBA に揃える
+        if img.mode not in ("RGB", "RGBA", "L"):
+            img = img.convert("RGBA" if "A" in img.getbands() else "RGB")
+        image_format, channels = {
+            "RGB": (QImage.Format_RGB888, 3),
+            "RGBA": (QImage.Format_RGBA8888, 4),
+            "L": (QImage.Format_Grayscale8, 1),
+        }[img.mode]
+
+        width, height = img.size
+        data = img.tobytes("raw", img.mode)
+        # QImageは data を参照する (PySide6 がバッファの参照を保持し、呼び出し側はすぐに QPixmap に変換する)
+        qimg = QImage(data, width, height, width * channels, image_format)
+        return None if qimg.isNull() else qimg
+
     def _generate_with_vips(self) -> Optional[QPixmap]:
         """libvipsを使用してサムネイルを生成"""
         if not HAS_VIPS: return None
@@ -393,18 +603,16 @@ class UnifiedThumbnailWorker(BaseWorker):
         try:
             self.update_progress(30, "画像読み込み中 (VIPS)...")
 
-            # --- Modified VIPS thumbnail call ---
-            # Use thumbnail function, only specify width. Height is calculated.
-            # Remove unsupported keyword arguments like 'size' and potentially 'height' if width is enough.
-            # Keep auto_rotate=True as it's generally useful and supported.
+            # Image.thumbnail uses shrink-on-load (JPEG DCT scaling, native resolution
+            # for PDF/SVG), so the full image is never decoded.
+            # size="down" avoids upscaling images smaller than the target.
             vips_thumb = pyvips.Image.thumbnail(
                 self.image_path,
                 self.size[0], # Target width
-                height=self.size[1], # Specify target height as well, VIPS should handle aspect ratio
+                height=self.size[1], # VIPS keeps the aspect ratio within width x height
+                size="down",
                 auto_rotate=True
-                # Removed: size=pyvips.enums.Size.BOTH
             )
-            # --- End Modification ---
 
 
             # Update image info if possible (thumbnail might not have original size)
@@ -415,40 +623,14 @@ class UnifiedThumbnailWorker(BaseWorker):
             self.check_cancelled() # Check after loading/thumbnailing
             self.update_progress(70, "フォーマット変換中 (VIPS)...")
 
-            # Write to buffer in a suitable format (e.g., WebP or PNG)
-            # WebP generally offers good compression/speed balance
-            buffer_format = ".webp"
-            save_options = {"Q": self.webp_quality, "strip": self.strip_metadata, "lossless": False}
-            # Alternative: PNG for guaranteed lossless alpha
-            # buffer_format = ".png"
-            # save_options = {"compression": 1, "strip": self.strip_metadata}
-
-            image_data = vips_thumb.write_to_buffer(buffer_format, **save_options)
-
-            self.check_cancelled() # Check after writing to buffer
-            self.update_progress(85, "QPixmapに変換中 (VIPS)...")
-
-            q_image = QImage()
-            load_ok = q_image.loadFromData(image_data) # Load from buffer
-
-            if not load_ok or q_image.isNull():
-                 logger.warning(f"Failed to load QImage from VIPS {buffer_format} buffer for {self.worker_id}")
-                 # Try PNG fallback if WebP failed?
-                 if buffer_format == ".webp":
-                      logger.debug(f"Retrying VIPS generation with PNG format for {self.worker_id}")
-                      png_options = {"compression": 1, "strip": self.strip_metadata}
-                      image_data = vips_thumb.write_to_buffer(".png", **png_options)
-                      q_image = QImage() # Create new QImage instance
-                      load_ok = q_image.loadFromData(image_data)
-                      if not load_ok or q_image.isNull():
-                           logger.error(f"Failed to load QImage from VIPS PNG buffer for {self.worker_id}")
-                           return None
-                 else:
-                      return None # Already tried PNG or other format
+            # デコード済みのピクセルをそのままQImageに渡す (WebP/JPEGへのエンコード/デコードの往復なし)
+            q_image = self._vips_to_qimage(vips_thumb)
+            if q_image is None:
+                logger.warning(f"Failed to convert VIPS thumbnail to QImage for {self.worker_id}")
+                return None
 
-            pixmap = QPixmap.fromImage(q_image)
             logger.debug(f"VIPS generation successful for {self.worker_id}")
-            return pixmap
+            return QPixmap.fromImage(q_image)
 
         except pyvips.Error as vips_e:
             # Catch specific VIPS errors
@@ -462,47 +644,107 @@ class UnifiedThumbnailWorker(BaseWorker):
             logger.error(f"Unexpected VIPS generation error for {self.worker_id}: {e}", exc_info=True)
             return None
 
+    def _vips_to_qimage(self, vips_image) -> Optional[QImage]:
+        """
+        libvipsの画像をメモリ上のピクセルから直接QImageに変換
+
+        Args:
+            vips_image: pyvips.Image (8bit sRGB/グレースケールを想定)
+
+        Returns:
+            QImage or None: 変換後の画像。対応していない形式の場合はNone
+        """
+        try:
+            # CMYK・16bitなどは8bit sRGBに変換
+            # (グレースケール+アルファはQImageに対応形式がないためRGBAにする)
+            if vips_image.interpretation not in ("srgb", "b-w") or vips_image.bands == 2:
+                vips_image = vips_image.colourspace("srgb")
+            if vips_image.format != "uchar":
+                vips_image = vips_image.cast("uchar")
+            # 5バンド以上 (アルファ以外の追加チャンネルを持つ画像など) は先頭のRGB(A)だけを使う
+            if vips_image.bands > 4:
+                vips_image = vips_image.extract_band(0, n=4 if vips_image.hasalpha() else 3)
+
+            # pyvips のプロパティ参照は毎回 FFI 呼び出しになるため、1回だけ読んで使い回す
+            bands = vips_image.bands
+            image_format = {
+                1: QImage.Format_Grayscale8,
+                3: QImage.Format_RGB888,
+                4: QImage.Format_RGBA8888,
+            }.get(bands)
+            if image_format is None:
+                return None
+
+            data = vips_image.write_to_memory()
+            width, height = vips_image.width, vips_image.height
+            # QImageは data を参照するだけで複製しない (PySide6 がバッファの参照を保持する)。
+            # 呼び出し側はすぐに QPixmap.fromImage で変換するため、ここでの copy() は不要
+            q_image = QImage(data, width, height, width * bands, image_format)
+            return None if q_image.isNull() else q_image
+        except pyvips.Error as e:
+            logger.debug(f"Direct VIPS to QImage conversion failed for {self.worker_id}: {e}")
+            return None
+
     def _generate_with_qt(self) -> Optional[QPixmap]:
         """Qtを使用してサムネイルを生成"""
         logger.debug(f"Generating thumbnail with Qt for {self.worker_id}")
         try:
             self.update_progress(40, "画像を読み込み中 (Qt)...")
 
-            # QPixmap is generally preferred for display, try loading directly
-            pixmap = QPixmap(self.image_path)
-
-            if pixmap.isNull():
-                # Try QImage as fallback if QPixmap fails
-                logger.debug(f"QPixmap failed for {self.worker_id}, trying QImage.")
-                qimg = QImage(self.image_path)
-                if qimg.isNull():
-                    logger.warning(f"Qt failed to load image: {self.image_path} ({self.worker_id})")
-                    return None # Return None instead of placeholder here
-                else:
-                     self.image_width = qimg.width()
-                     self.image_height = qimg.height()
-                     pixmap = QPixmap.fromImage(qimg) # Convert loaded QImage to QPixmap
-            else:
-                 self.image_width = pixmap.width()
-                 self.image_height = pixmap.height()
-
+            # QImage はワーカースレッドで安全に扱えるため、読み込みと縮小は QImageReader/QImage で行う。
+            # ヘッダーから原寸が分かる場合は読み込み時に縮小させる
+            # (JPEGはlibjpegのDCTスケーリングが効き、原寸のデコードと別パスの縮小を省ける)
+            reader = QImageReader(self.image_path)
+            reader.setAutoTransform(True) # libvipsの auto_rotate と同様にEXIFの向きを反映
+            source_size = reader.size()
+            if source_size.isValid():
+                self.image_width = source_size.width()
+                self.image_height = source_size.height()
+                target_size = QSize(self.size[0], self.size[1])
+                # 90度回転する画像は、回転前の寸法に対して縦横を入れ替えた枠に収める
+                if reader.transformation() & QImageIOHandler.Transformation.TransformationRotate90:
+                    target_size.transpose()
+                # libvipsの size="down" と同じく拡大はしない
+                if source_size.width() > target_size.width() or source_size.height() > target_size.height():
+                    reader.setScaledSize(source_size.scaled(target_size, Qt.AspectRatioMode.KeepAspectRatio))
+
+            image = reader.read()
+            if image.isNull():
+                logger.warning(f"Qt failed to load image: {self.image_path} ({self.worker_id}): {reader.errorString()}")
+                return None # Return None instead of placeholder here
 
             self.check_cancelled() # Check after loading
             self.update_progress(60, "サムネイル生成中 (Qt)...")
 
-            # Scale the loaded pixmap
-            thumbnail = pixmap.scaled(
+            if source_size.isValid():
+                logger.debug(f"Qt generation (scaled read) successful for {self.worker_id}")
+                return QPixmap.fromImage(image)
+
+            # ヘッダーから寸法が取れなかった場合は、デコード後に縮小する
+            self.image_width = image.width()
+            self.image_height = image.height()
+
+            # libvipsが使える場合は、読み込めなかった形式でも縮小だけはlibvipsで行う
+            # (Qtの SmoothTransformation より高速で、縮小時の画質も良い)
+            if self.use_vips and HAS_VIPS:
+                scaled_image = self._scale_with_vips(image)
+                if scaled_image is not None:
+                    logger.debug(f"Qt generation (VIPS resize) successful for {self.worker_id}")
+                    return QPixmap.fromImage(scaled_image)
+
+            # Scale the loaded image
+            thumbnail = image.scaled(
                 self.size[0], self.size[1],
                 Qt.AspectRatioMode.KeepAspectRatio, # Use AspectRatioMode enum
                 Qt.TransformationMode.SmoothTransformation # Use TransformationMode enum
             )
 
             if thumbnail.isNull():
-                 logger.warning(f"Qt scaling resulted in null pixmap for {self.worker_id}")
+                 logger.warning(f"Qt scaling resulted in null image for {self.worker_id}")
                  return None
 
             logger.debug(f"Qt generation successful for {self.worker_id}")
-            return thumbnail
+            return QPixmap.fromImage(thumbnail)
 
         except CancellationError:
              raise # Propagate cancellation
@@ -510,29 +752,62 @@ class UnifiedThumbnailWorker(BaseWorker):
             logger.error(f"Qt generation error for {self.worker_id}: {e}", exc_info=True)
             return None # Return None on error
 
+    def _scale_with_vips(self, image: QImage) -> Optional[QImage]:
+        """
+        デコード済みのQImageをlibvipsで縮小
 
-    def _create_error_placeholder(self, text="Error") -> QPixmap:
-        """エラー時のプレースホルダーを生成"""
+        Args:
+            image: 縮小する画像
+
+        Returns:
+            QImage or None: 縮小後の画像。失敗した場合はNone
+        """
         try:
-             pixmap = QPixmap(self.size[0], self.size[1])
-             pixmap.fill(Qt.GlobalColor.lightGray) # Use GlobalColor enum
-             pixmap.setProperty("isErrorPlaceholder", True) # Set custom property
-
-             # Optionally draw text indicating error
-             # from PySide6.QtGui import QPainter, QColor, QPen
-             # painter = QPainter(pixmap)
-             # pen = QPen(QColor(Qt.GlobalColor.red))
-             # painter.setPen(pen)
-             # painter.drawText(pixmap.rect(), Qt.AlignmentFlag.AlignCenter, text)
-             # painter.end()
-
-             return pixmap
+            # RGBA8888 は行末のパディングがないため、ピクセルをそのままlibvipsに渡せる
+            rgba = image.convertToFormat(QImage.Format.Format_RGBA8888)
+            vips_image = pyvips.Image.new_from_memory(
+                rgba.constBits(), rgba.width(), rgba.height(), 4, "uchar"
+            ).copy(interpretation="srgb")
+            scaled = vips_image.thumbnail_image(self.size[0], height=self.size[1], size="down")
+            return self._vips_to_qimage(scaled)
         except Exception as e:
-             logger.error(f"Failed to create error placeholder: {e}")
-             # Return an absolutely minimal pixmap if creation fails
-             err_pixmap = QPixmap(1, 1)
-             err_pixmap.setProperty("isErrorPlaceholder", True)
-             return err_pixmap
+            logger.debug(f"VIPS resize of Qt-decoded image failed for {self.worker_id}: {e}")
+            return None
+
+
+    def _create_error_placeholder(self, text="Error") -> QPixmap:
+        """
+        エラー時のプレースホルダーを取得
+
+        同じサイズのプレースホルダーはプロセス内で1つを共有します
+        (表示専用で変更しないため共有しても安全)。
+
+        Args:
+            text: エラーの説明 (ログ用。プレースホルダーには描画しない)
+
+        Returns:
+            QPixmap: プレースホルダー画像
+        """
+        with _error_placeholders_lock:
+            pixmap = _error_placeholders.get(self.size)
+            if pixmap is None:
+                pixmap = QPixmap(self.size[0], self.size[1])
+                pixmap.fill(Qt.GlobalColor.lightGray) # Use GlobalColor enum
+                _error_placeholders[self.size] = pixmap
+        logger.debug(f"Using error placeholder for {self.worker_id}: {text}")
+        return pixmap
+
+    def _is_error_placeholder(self, pixmap: QPixmap) -> bool:
+        """
+        共有のエラープレースホルダーかどうかを判定 (キャッシュに保存しないため)
+
+        Args:
+            pixmap: 判定する画像
+
+        Returns:
+            bool: プレースホルダーの場合はTrue
+        """
+        return pixmap is _error_placeholders.get(self.size)
 
 
     # This might be redundant if worker manager tracks info
@@ -547,4 +822,123 @@ class UnifiedThumbnailWorker(BaseWorker):
             "engine_used": self.engine_used
         }
 
+
+class BatchThumbnailWorker(UnifiedThumbnailWorker):
+    """
+    同じ画像の複数サイズのサムネイルをまとめて生成するワーカークラス
+
+    libvipsでは全サイズを包含する大きさまで1回だけ縮小読み込み (shrink-on-load) し、
+    メモリ上に展開した結果から各サイズを生成するため、原画像のデコードは1回で済みます。
+    """
+
+    def __init__(self, image_path: str, sizes: Sequence[Union[Tuple[int, int], QSize]],
+                 thumbnail_cache=None, worker_id: str = None,
+                 cancel_event: Optional[threading.Event] = None,
+                 params: Optional[Dict[str, Any]] = None):
+        """
+        初期化
+
+        Args:
+            image_path: 原画像のパス
+            sizes: 生成するサムネイルのサイズのリスト (width, height) or QSize
+            thumbnail_cache: サムネイルキャッシュ（オプション）
+            worker_id: ワーカーの識別子（オプション）
+            cancel_event: 共有キャンセルイベント（オプション）
+            params: load_generation_params() で生成したパラメータ（オプション）
+        """
+        self.sizes: List[Tuple[int, int]] = [
+            size if isinstance(size, tuple) else (size.width(), size.height()) for size in sizes
+        ]
+        # すべてのサイズを包含する大きさ (縮小読み込みの目標)
+        bounding_size = (max(size[0] for size in self.sizes), max(size[1] for size in self.sizes))
+        super().__init__(image_path, bounding_size, thumbnail_cache, worker_id=worker_id,
+                         cancel_event=cancel_event, params=params)
+
+    @Slot()
+    def work(self) -> Tuple[str, List[Tuple[Tuple[int, int], QPixmap]]]:
+        """
+        すべてのサイズのサムネイルを生成
+
+        Returns:
+            (image_path, [(size, thumbnail), ...]): 画像パスとサイズごとのサムネイルのリスト
+        """
+        self.check_cancelled()
+
+        results: List[Tuple[Tuple[int, int], QPixmap]] = []
+        missing_sizes: List[Tuple[int, int]] = []
+        for size in self.sizes:
+            thumbnail = None
+            if self.thumbnail_cache:
+                try:
+                    thumbnail = self.thumbnail_cache.get_thumbnail(self.image_path, size)
+                except Exception as cache_e:
+                    logger.warning(f"Cache check error for {self.worker_id}: {cache_e}")
+            if thumbnail is not None and not thumbnail.isNull():
+                results.append((size, thumbnail))
+            else:
+                missing_sizes.append(size)
+
+        # 存在確認は行わない (読み込めない場合は下のサイズごとの処理でプレースホルダーを返す)
+        if missing_sizes and self.use_vips and HAS_VIPS:
+            generated = self._generate_sizes_with_vips(missing_sizes)
+            if generated is not None:
+                self.engine_used = self.ENGINE_VIPS
+                for size, pixmap in generated:
+                    if self.thumbnail_cache:
+                        try:
+                            self.thumbnail_cache.store_thumbnail(self.image_path, size, pixmap)
+                        except Exception as cache_e:
+                            logger.warning(f"Cache store error for {self.worker_id}: {cache_e}")
+                    results.append((size, pixmap))
+                missing_sizes = []
+
+        # libvipsを使えない場合はサイズごとに通常の生成処理を行う
+        for size in missing_sizes:
+            self.check_cancelled()
+            self.size = size
+            _, pixmap = super().work()
+            results.append((size, pixmap))
+
+        return (self.image_path, results)
+
+    def _generate_sizes_with_vips(self, sizes: List[Tuple[int, int]]) -> Optional[List[Tuple[Tuple[int, int], QPixmap]]]:
+        """
+        libvipsで原画像を1回だけ読み込み、複数サイズのサムネイルを生成
+
+        Args:
+            sizes: 生成するサイズのリスト
+
+        Returns:
+            list or None: (size, thumbnail) のリスト。失敗した場合はNone
+        """
+        bounding_width = max(size[0] for size in sizes)
+        bounding_height = max(size[1] for size in sizes)
+        try:
+            # 最大サイズまでの縮小読み込みを1回だけ行い、ピクセルをメモリに展開して使い回す
+            source = pyvips.Image.thumbnail(
+                self.image_path, bounding_width, height=bounding_height,
+                size="down", auto_rotate=True
+            ).copy_memory()
+            self.image_width = source.width
+            self.image_height = source.height
+
+            generated = []
+            for size in sizes:
+                self.check_cancelled()
+                if size == (bounding_width, bounding_height):
+                    scaled = source
+                else:
+                    scaled = source.thumbnail_image(size[0], height=size[1], size="down")
+                q_image = self._vips_to_qimage(scaled)
+                if q_image is None:
+                    return None
+                generated.append((size, QPixmap.fromImage(q_image)))
+            return generated
+
+        except CancellationError:
+            raise
+        except Exception as e:
+            logger.warning(f"VIPS multi-size generation failed for {self.worker_id}: {e}")
+            return None
+
 # --- END REFACTORED controllers/unified_thumbnail_worker.py ---
@@ -4,9 +4,10 @@
 
 マルチスレッド処理を管理するクラスを提供します。
 """
-from typing import Dict, List, Optional, Any, Union
+from typing import Callable, Dict, List, Optional, Any, Union
 import time
 import threading
+import weakref
 from PySide6.QtCore import QThreadPool, QRunnable, QObject, Signal, Slot # Import Slot
 from utils import logger, get_config
 from .workers import BaseWorker # Import BaseWorker for type hinting and signal connection
@@ -57,6 +58,9 @@ class WorkerManager(QObject):
         self.active_workers: Dict[str, QRunnable] = {}  # ワーカーID → ワーカーインスタンスのマッピング
         self.worker_start_times: Dict[str, float] = {}  # ワーカーID → 開始時間のマッピング
         self.mutex = threading.RLock()  # Use RLock for reentrant lock safety
+        # cancel_all() の際に呼び出すキャンセル処理 (マネージャーを経由せずにワーカーを起動するオブジェクト用)
+        # 登録元の寿命を延ばさないよう弱参照で保持する
+        self._cancel_hooks: List[weakref.WeakMethod] = []
 
         # シグナルオブジェクト
         self.signals = WorkerManagerSignals()
@@ -177,14 +181,44 @@ class WorkerManager(QObject):
             return False
 
 
+    def register_cancel_hook(self, callback: Callable[[], None]) -> None:
+        """
+        cancel_all() の際に呼び出すキャンセル処理を登録
+
+        WorkerManagerを経由せずにスレッドプールへワーカーを投入するオブジェクト
+        (BatchProcessorなど) が、アプリケーション終了時のキャンセルに参加するために使います。
+
+        Args:
+            callback: 引数なしで呼び出すバインドメソッド (弱参照で保持)
+        """
+        with self.mutex:
+            self._cancel_hooks.append(weakref.WeakMethod(callback))
+
+    def _run_cancel_hooks(self) -> None:
+        """登録されたキャンセル処理を呼び出し、破棄済みのものを取り除く"""
+        with self.mutex:
+            self._cancel_hooks = [hook for hook in self._cancel_hooks if hook() is not None]
+            hooks = list(self._cancel_hooks)
+        for hook in hooks:
+            callback = hook()
+            if callback is None:
+                continue
+            try:
+                callback()
+            except Exception as e:
+                logger.exception(f"Error in cancel hook {callback!r}: {e}")
+
     def cancel_all(self) -> int:
         """
         すべてのワーカーをキャンセル
 
+        register_cancel_hook() で登録されたキャンセル処理も呼び出します。
+
         Returns:
             int: キャンセルが試行されたワーカーの数
         """
         logger.info("Attempting to cancel all active workers.")
+        self._run_cancel_hooks()
         cancelled_count = 0
         try:
             with self.mutex:
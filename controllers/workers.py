@@ -5,6 +5,7 @@
 バックグラウンド処理を行うワーカークラスの基盤を提供します。
 """
 import time
+import threading
 import traceback
 from typing import Optional, Any, TypeVar, Generic
 import os # Keep os for worker_id generation if needed
@@ -29,6 +30,7 @@ class WorkerSignals(QObject, Generic[T]):
     finished = Signal()  # ワーカーが終了した（成功でもエラーでも）
     cancelled = Signal()  # ワーカーがキャンセルされた
     error = Signal(str)  # エラーメッセージ
+    failed = Signal(str, str)  # (worker_id, エラーメッセージ)
     result = Signal(object)  # 処理結果 (型Tのオブジェクト)
     progress = Signal(int)  # 進捗率 (0-100)
     progress_status = Signal(str)  # 進捗状況の説明
@@ -45,17 +47,20 @@ class BaseWorker(QRunnable):
     処理のキャンセル、進捗報告、エラー処理などの共通機能を提供します。
     """
 
-    def __init__(self, worker_id: Optional[str] = None):
+    def __init__(self, worker_id: Optional[str] = None, cancel_event: Optional[threading.Event] = None):
         """
         初期化
 
         Args:
             worker_id: ワーカーの識別子（省略時は自動生成）
+            cancel_event: 複数のワーカーで共有するキャンセルイベント（オプション）
+                          セットされるとこのワーカーもキャンセル扱いになります
         """
         super().__init__()
         # self.setAutoDelete(True) # Set auto delete to False if manager handles instance lifecycle? Let's keep it True for now.
         self.signals = WorkerSignals()
         self._is_cancelled = False # Use underscore for internal flag
+        self._cancel_event = cancel_event
         self._start_time = 0
         self.worker_id = worker_id or f"worker_{id(self)}"
         self._last_progress = -1 # Initialize to -1 to force first update
@@ -68,7 +73,7 @@ class BaseWorker(QRunnable):
     @property
     def is_cancelled(self) -> bool:
         """Check if the worker has been cancelled."""
-        return self._is_cancelled
+        return self._is_cancelled or (self._cancel_event is not None and self._cancel_event.is_set())
 
     def cancel(self) -> bool:
         """
@@ -98,7 +103,7 @@ class BaseWorker(QRunnable):
         Raises:
             CancellationError: キャンセルされた場合
         """
-        if self._is_cancelled:
+        if self.is_cancelled:
             # logger.debug(f"Worker {self.worker_id} check: Cancellation detected.")
             raise CancellationError(f"Worker {self.worker_id} was cancelled.")
         # No return value needed, exception is raised if cancelled
@@ -181,9 +186,10 @@ class BaseWorker(QRunnable):
             logger.debug(f"Error details for {self.worker_id}:", exc_info=True) # Log traceback
 
             # Emit error signal only if not cancelled
-            if not self._is_cancelled:
+            if not self.is_cancelled:
                 try:
                      self.signals.error.emit(error_msg)
+                     self.signals.failed.emit(self.worker_id, error_msg)
                 except RuntimeError as sig_e:
                      logger.warning(f"Could not emit error signal for {self.worker_id}: {sig_e}")
 
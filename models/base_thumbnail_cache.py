@@ -6,6 +6,7 @@
 import os
 import hashlib
 import time
+from collections import OrderedDict
 from abc import abstractmethod
 from typing import Dict, Tuple, Optional, Any, List, Union
 
@@ -25,6 +26,10 @@ class BaseThumbnailCache(QObject):
     cache_hit = Signal(str, tuple)  # キャッシュヒット (cache_key, size)
     cache_miss = Signal(str, tuple)  # キャッシュミス (image_path, size)
     
+    # アクセス頻度カウンタの上限 (2ビット相当)。
+    # 追い出し時に頻度が残っているキーは1回分減らして最新側に回す (CLOCK 方式のセカンドチャンス)
+    ACCESS_FREQ_MAX = 3
+    
     def __init__(self, memory_limit: int = None, disk_cache_dir: str = None, disk_cache_limit_mb: int = None):
         """
         初期化
@@ -46,10 +51,18 @@ class BaseThumbnailCache(QObject):
             disk_cache_dir = config.get("cache.disk_cache_dir", 
                                         os.path.join(os.path.expanduser("~"), ".picture_viewer_cache"))
         
+        # ディスクキャッシュはPNGではなく圧縮率の高い形式で保存する
+        # (150px前後のサムネイルでPNGの数分の1のサイズ。読み込み時にのみデコード)
+        self.disk_cache_format: str = config.get("cache.disk_format", "webp")
+        self.disk_cache_quality: int = config.get("cache.disk_quality", 85)
+        
         # 共通の基本プロパティ
         self.memory_limit: int = memory_limit
         self.memory_cache: Dict[str, QPixmap] = {}
-        self.access_order: List[str] = []
+        # access_order: 古い順に並んだキャッシュキー (move_to_end で O(1) 更新)
+        # access_freq: キーごとのアクセス頻度 (0..ACCESS_FREQ_MAX の小さなカウンタ)
+        self.access_order: "OrderedDict[str, None]" = OrderedDict()
+        self.access_freq: Dict[str, int] = {}
         self.disk_cache_dir: str = disk_cache_dir
         self.disk_cache_limit: int = disk_cache_limit_mb * 1024 * 1024  # バイト単位に変換
         
@@ -103,6 +116,28 @@ class BaseThumbnailCache(QObject):
         """
         pass
     
+    def get_thumbnails_bulk(self, image_paths: List[str], size: Tuple[int, int],
+                            memory_only: bool = False) -> Dict[str, Optional[QPixmap]]:
+        """
+        複数のサムネイルを一括で取得
+        
+        デフォルト実装は get_thumbnail を順に呼び出します（memory_only の場合は
+        memory_cache のみを参照します）。
+        サブクラスはロックの取得をまとめるためにオーバーライドできます。
+        
+        Args:
+            image_paths: 原画像のパスのリスト
+            size: サムネイルのサイズ (width, height)
+            memory_only: Trueの場合はメモリキャッシュのみを検索する
+            
+        Returns:
+            dict: 画像パス → サムネイル画像（キャッシュにない場合はNone）の辞書
+        """
+        if memory_only:
+            return {image_path: self.memory_cache.get(self._make_cache_key(image_path, size))
+                    for image_path in image_paths}
+        return {image_path: self.get_thumbnail(image_path, size) for image_path in image_paths}
+    
     @abstractmethod
     def store_thumbnail(self, image_path: str, size: Tuple[int, int], thumbnail: QPixmap) -> bool:
         """
@@ -153,13 +188,12 @@ class BaseThumbnailCache(QObject):
             str: キャッシュキー
         """
         try:
-            # ファイルの最終更新時間を含める
-            if os.path.exists(image_path):
-                mtime = os.path.getmtime(image_path)
-                return f"{image_path}_{size[0]}x{size[1]}_{int(mtime)}"
-            else:
-                # ファイルが存在しない場合はパスと時刻のみで生成
-                return f"{image_path}_{size[0]}x{size[1]}"
+            # ファイルの最終更新時間（ナノ秒）を含める。stat は1回のみ
+            mtime_ns = os.stat(image_path).st_mtime_ns
+            return f"{image_path}_{size[0]}x{size[1]}_{mtime_ns}"
+        except OSError:
+            # ファイルが存在しない場合はパスとサイズのみで生成
+            return f"{image_path}_{size[0]}x{size[1]}"
         except Exception as e:
             logger.warning(f"キャッシュキー生成エラー ({image_path}): {e}")
             # エラー時はシンプルなキーを生成
@@ -167,18 +201,58 @@ class BaseThumbnailCache(QObject):
     
     def _update_access_order(self, cache_key: str) -> None:
         """
-        アクセス順序を更新（LRU）
+        アクセス順序と頻度を更新（LRU + 頻度カウンタ）
         
         Args:
             cache_key: 更新するキャッシュキー
         """
         try:
             if cache_key in self.access_order:
-                self.access_order.remove(cache_key)
-            self.access_order.append(cache_key)
+                self.access_order.move_to_end(cache_key)
+                freq = self.access_freq.get(cache_key, 0) + 1
+                self.access_freq[cache_key] = min(freq, self.ACCESS_FREQ_MAX)
+            else:
+                # 新規追加時は頻度0から開始する
+                self.access_order[cache_key] = None
+                self.access_freq[cache_key] = 0
         except Exception as e:
             logger.warning(f"アクセス順序更新エラー: {e}")
     
+    def _remove_from_access_order(self, cache_key: str) -> None:
+        """
+        アクセス順序と頻度の情報からキーを削除
+        
+        Args:
+            cache_key: 削除するキャッシュキー
+        """
+        self.access_order.pop(cache_key, None)
+        self.access_freq.pop(cache_key, None)
+    
+    def _pop_eviction_victim(self) -> Optional[str]:
+        """
+        追い出すキーを選んでアクセス順序から取り除く
+        
+        最も古いキーから順に調べ、頻度が残っていれば1減らして最新側へ回し、
+        頻度0のキーを追い出し対象とします。頻度は上限付きなので
+        走査は高々 (ACCESS_FREQ_MAX + 1) 周で終わります。
+        
+        Returns:
+            str or None: 追い出すキャッシュキー。空の場合はNone
+        """
+        access_order = self.access_order
+        access_freq = self.access_freq
+        while access_order:
+            cache_key = next(iter(access_order))
+            freq = access_freq.get(cache_key, 0)
+            if freq > 0:
+                access_freq[cache_key] = freq - 1
+                access_order.move_to_end(cache_key)
+                continue
+            del access_order[cache_key]
+            access_freq.pop(cache_key, None)
+            return cache_key
+        return None
+    
     def _add_to_memory_cache(self, cache_key: str, thumbnail: QPixmap) -> None:
         """
         メモリキャッシュに追加
@@ -188,13 +262,12 @@ class BaseThumbnailCache(QObject):
             thumbnail: サムネイル画像
         """
         try:
-            # キャッシュサイズが制限を超えた場合、古いアイテムを削除
+            # キャッシュサイズが制限を超えた場合、頻度の低い古いアイテムを削除
             if len(self.memory_cache) >= self.memory_limit and cache_key not in self.memory_cache:
-                if self.access_order:
-                    oldest_key = self.access_order.pop(0)
-                    if oldest_key in self.memory_cache:
-                        del self.memory_cache[oldest_key]
-                        logger.debug(f"古いアイテムをメモリキャッシュから削除: {oldest_key}")
+                oldest_key = self._pop_eviction_victim()
+                if oldest_key is not None and oldest_key in self.memory_cache:
+                    del self.memory_cache[oldest_key]
+                    logger.debug(f"古いアイテムをメモリキャッシュから削除: {oldest_key}")
             
             self.memory_cache[cache_key] = thumbnail
             self._update_access_order(cache_key)
@@ -217,14 +290,15 @@ class BaseThumbnailCache(QObject):
         """
         try:
             # ハッシュ値を使用して一意のファイル名を生成
+            # 1つのディレクトリにファイルが集中しないよう、ハッシュの先頭2文字のサブディレクトリに分散する
             hash_input = f"{image_path}_{size[0]}x{size[1]}"
             hash_value = hashlib.md5(hash_input.encode()).hexdigest()
-            return os.path.join(self.disk_cache_dir, f"{hash_value}.png")
+            return os.path.join(self.disk_cache_dir, hash_value[:2], f"{hash_value}.{self.disk_cache_format}")
         except Exception as e:
             logger.error(f"ディスクキャッシュパス生成エラー: {e}")
             # フォールバックとして簡略化したパスを生成
             safe_name = os.path.basename(image_path).replace(" ", "_")
-            return os.path.join(self.disk_cache_dir, f"{safe_name}_{size[0]}x{size[1]}.png")
+            return os.path.join(self.disk_cache_dir, f"{safe_name}_{size[0]}x{size[1]}.{self.disk_cache_format}")
     
     def purge_invalid_entries(self) -> int:
         """
@@ -7,6 +7,8 @@
 """
 from PySide6.QtCore import QObject, Signal
 
+from utils import logger
+
 class ImageModel(QObject):
     """
     画像データとメタデータを管理するモデルクラス
@@ -30,7 +32,8 @@ class ImageModel(QObject):
             image_path (str): 画像ファイルへのパス
             metadata (dict, optional): 画像に関連するメタデータ
         """
-        if image_path not in self.images:
+        # metadata は画像パスをキーに持つため、リストを走査せずに存在チェックできる
+        if image_path not in self.metadata:
             self.images.append(image_path)
             self.metadata[image_path] = metadata or {}
             # self.data_changed.emit() # ここでは発行しない
@@ -43,29 +46,28 @@ class ImageModel(QObject):
             image_paths (list): 画像ファイルパスのリスト
             metadatas (list, optional): 各画像に対応するメタデータのリスト (辞書)。省略した場合は空辞書。
         """
-        added_new = False
-        num_paths = len(image_paths)
-
-        if metadatas is None:
-            metadatas = [{} for _ in range(num_paths)]
-        elif len(metadatas) != num_paths:
+        if metadatas is not None and len(metadatas) != len(image_paths):
             raise ValueError("image_pathsとmetadatasの数が一致しません")
 
-        current_image_set = set(self.images) # 高速な存在チェックのためセットを使用
-
-        new_images = []
+        # 既存の画像の存在チェックには metadata の辞書をそのまま使う
+        # (呼び出しごとに set(self.images) を作り直さない)
+        # 新しい画像のメタデータは追加するものだけ作る
+        known = self.metadata
         new_metadata = {}
-
-        for i, image_path in enumerate(image_paths):
-            if image_path not in current_image_set:
-                new_images.append(image_path)
-                new_metadata[image_path] = metadatas[i] or {}
-                added_new = True
-
-        if added_new:
-            self.images.extend(new_images)
+        if metadatas is None:
+            for image_path in image_paths:
+                if image_path not in known and image_path not in new_metadata:
+                    new_metadata[image_path] = {}
+        else:
+            for image_path, metadata in zip(image_paths, metadatas):
+                if image_path not in known and image_path not in new_metadata:
+                    new_metadata[image_path] = metadata or {}
+
+        if new_metadata:
+            # 辞書は挿入順を保つため、キーの順がそのまま追加順になる
+            self.images.extend(new_metadata)
             self.metadata.update(new_metadata)
-            print(f"DEBUG: Emitting data_changed after adding {len(new_images)} images.")
+            logger.debug("Emitting data_changed after adding %d images.", len(new_metadata))
             self.data_changed.emit() # バッチ処理後に一度だけ発行
 
     def clear(self):
@@ -73,7 +75,7 @@ class ImageModel(QObject):
         if self.images or self.metadata: # 変更があった場合のみシグナルを発行
             self.images.clear()
             self.metadata.clear()
-            print("DEBUG: Emitting data_changed after clear.")
+            logger.debug("Emitting data_changed after clear.")
             self.data_changed.emit()
 
     def image_count(self):
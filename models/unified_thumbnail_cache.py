@@ -17,7 +17,7 @@ import json
 import threading
 from typing import Dict, Tuple, Optional, List, Any, Union, Set
 
-from PySide6.QtCore import QTimer
+from PySide6.QtCore import QTimer, QThreadPool
 from PySide6.QtGui import QPixmap, QImage
 
 from utils import logger, get_config
@@ -55,6 +55,9 @@ class UnifiedThumbnailCache(BaseThumbnailCache):
         
         # スレッドセーフなロック
         self.cache_lock = threading.RLock()
+        # メモリキャッシュヒット時のアクセス時間の更新 (DBへの書き込みはスレッドプールでまとめて行う)
+        self._pending_access_updates: List[Tuple[str, int, int]] = []
+        self._access_flush_scheduled = False
         
         # データベースのパスを設定
         if db_path is None:
@@ -165,6 +168,78 @@ class UnifiedThumbnailCache(BaseThumbnailCache):
         
         まずメモリキャッシュをチェックし、次にディスクキャッシュをチェックします。
         
+        Args:
+            image_path: 原画像のパス
+            size: サムネイルのサイズ (width, height)
+            
+        Returns:
+            QPixmap or None: サムネイル画像。キャッシュにない場合はNone
+        """
+        with self.cache_lock:
+            return self._lookup_thumbnail(image_path, size)
+    
+    def get_thumbnails_bulk(self, image_paths: List[str], size: Tuple[int, int],
+                            memory_only: bool = False) -> Dict[str, Optional[QPixmap]]:
+        """
+        複数のサムネイルを一括で取得（スレッドセーフに実装）
+        
+        ロックの取得はバッチ全体で1回のみ行い、各パスについて
+        get_thumbnail と同じ順序（メモリ → ディスク）で検索します。
+        
+        Args:
+            image_paths: 原画像のパスのリスト
+            size: サムネイルのサイズ (width, height)
+            memory_only: Trueの場合はメモリキャッシュのみを検索し、ディスクは読みに行かない
+                         （GUIスレッドからの呼び出し向け。ミスは統計に計上しない）
+            
+        Returns:
+            dict: 画像パス → サムネイル画像（キャッシュにない場合はNone）の辞書
+        """
+        lookup = self._lookup_memory if memory_only else self._lookup_thumbnail
+        with self.cache_lock:
+            # メモリヒット時のアクセス時間更新は保留され、スレッドプールで1回のトランザクションにまとめて書き込まれる
+            return {image_path: lookup(image_path, size) for image_path in image_paths}
+    
+    def _lookup_memory(self, image_path: str, size: Tuple[int, int]) -> Optional[QPixmap]:
+        """
+        メモリキャッシュのみからサムネイルを検索
+        
+        呼び出し側で cache_lock を保持していることを前提とします。
+        
+        Args:
+            image_path: 原画像のパス
+            size: サムネイルのサイズ (width, height)
+            
+        Returns:
+            QPixmap or None: サムネイル画像。メモリキャッシュにない場合はNone
+        """
+        if not image_path:
+            return None
+        
+        try:
+            cache_key = self._make_cache_key(image_path, size)
+            thumbnail = self.memory_cache.get(cache_key)
+            if thumbnail is None:
+                return None
+            
+            self._update_access_order(cache_key)
+            self._touch_db_access_time(image_path, size, cache_key)
+            self.recently_accessed.add(cache_key)
+            self.stats["hits"] += 1
+            self.cache_hit.emit(cache_key, size)
+            return thumbnail
+            
+        except Exception as e:
+            logger.error(f"サムネイル取得エラー ({image_path}): {e}")
+            self.stats["errors"] += 1
+            return None
+    
+    def _lookup_thumbnail(self, image_path: str, size: Tuple[int, int]) -> Optional[QPixmap]:
+        """
+        メモリキャッシュ、ディスクキャッシュの順にサムネイルを検索
+        
+        呼び出し側で cache_lock を保持していることを前提とします。
+        
         Args:
             image_path: 原画像のパス
             size: サムネイルのサイズ (width, height)
@@ -177,38 +252,37 @@ class UnifiedThumbnailCache(BaseThumbnailCache):
             return None
         
         try:
-            with self.cache_lock:
-                # メモリキャッシュをチェック
-                cache_key = self._make_cache_key(image_path, size)
-                if cache_key in self.memory_cache:
-                    self._update_access_order(cache_key)
-                    self._update_db_access_time(image_path, size, cache_key)
-                    self.recently_accessed.add(cache_key)
-                    logger.debug(f"メモリキャッシュヒット: {image_path}")
-                    self.stats["hits"] += 1
-                    self.cache_hit.emit(cache_key, size)
-                    return self.memory_cache[cache_key]
-                
-                # ディスクキャッシュをチェック
-                disk_thumbnail = self._load_from_disk(image_path, size, cache_key)
-                if disk_thumbnail is not None:
-                    self._add_to_memory_cache(cache_key, disk_thumbnail)
-                    self.recently_accessed.add(cache_key)
-                    logger.debug(f"ディスクキャッシュヒット: {image_path}")
-                    self.stats["hits"] += 1
-                    self.cache_hit.emit(cache_key, size)
-                    return disk_thumbnail
-                
-                logger.debug(f"キャッシュミス: {image_path}")
-                self.stats["misses"] += 1
-                self.cache_miss.emit(image_path, size)
-                
-                # 近接ファイルを事前読み込み候補に追加（オプション）
-                if self._should_add_prefetch_candidate(image_path):
-                    self.prefetch_candidates.add(image_path)
-                
-                return None
-                
+            # メモリキャッシュをチェック
+            cache_key = self._make_cache_key(image_path, size)
+            if cache_key in self.memory_cache:
+                self._update_access_order(cache_key)
+                self._touch_db_access_time(image_path, size, cache_key)
+                self.recently_accessed.add(cache_key)
+                logger.debug(f"メモリキャッシュヒット: {image_path}")
+                self.stats["hits"] += 1
+                self.cache_hit.emit(cache_key, size)
+                return self.memory_cache[cache_key]
+            
+            # ディスクキャッシュをチェック
+            disk_thumbnail = self._load_from_disk(image_path, size, cache_key)
+            if disk_thumbnail is not None:
+                self._add_to_memory_cache(cache_key, disk_thumbnail)
+                self.recently_accessed.add(cache_key)
+                logger.debug(f"ディスクキャッシュヒット: {image_path}")
+                self.stats["hits"] += 1
+                self.cache_hit.emit(cache_key, size)
+                return disk_thumbnail
+            
+            logger.debug(f"キャッシュミス: {image_path}")
+            self.stats["misses"] += 1
+            self.cache_miss.emit(image_path, size)
+            
+            # 近接ファイルを事前読み込み候補に追加（オプション）
+            if self._should_add_prefetch_candidate(image_path):
+                self.prefetch_candidates.add(image_path)
+            
+            return None
+            
         except Exception as e:
             logger.error(f"サムネイル取得エラー ({image_path}): {e}")
             self.stats["errors"] += 1
@@ -271,12 +345,15 @@ class UnifiedThumbnailCache(BaseThumbnailCache):
                 # メモリキャッシュをクリア
                 self.memory_cache.clear()
                 self.access_order.clear()
+                self.access_freq.clear()
                 self.recently_accessed.clear()
                 self.prefetch_candidates.clear()
                 logger.info("メモリキャッシュをクリアしました")
                 
                 # ディスクキャッシュをクリア
                 if clear_disk:
+                    # 削除する行へのアクセス時間の更新は不要
+                    self._pending_access_updates.clear()
                     try:
                         # SQLiteデータベースからすべてのキャッシュファイルパスを取得
                         conn = sqlite3.connect(self.db_path)
@@ -454,10 +531,10 @@ class UnifiedThumbnailCache(BaseThumbnailCache):
                         # 最も古いアイテムを削除
                         removed = 0
                         for _ in range(items_to_remove):
-                            if not self.access_order:
+                            oldest_key = self._pop_eviction_victim()
+                            if oldest_key is None:
                                 break
                                 
-                            oldest_key = self.access_order.pop(0)
                             if oldest_key in self.memory_cache:
                                 del self.memory_cache[oldest_key]
                                 removed += 1
@@ -517,8 +594,7 @@ class UnifiedThumbnailCache(BaseThumbnailCache):
                     # メモリキャッシュからも削除
                     if cache_key in self.memory_cache:
                         del self.memory_cache[cache_key]
-                        if cache_key in self.access_order:
-                            self.access_order.remove(cache_key)
+                        self._remove_from_access_order(cache_key)
                     
                     # データベースから削除
                     cursor.execute("DELETE FROM thumbnails WHERE id = ?", (entry_id,))
@@ -543,10 +619,13 @@ class UnifiedThumbnailCache(BaseThumbnailCache):
         """
         ディスクキャッシュから読み込み
         
+        キャッシュキーには原画像の更新時刻が含まれるため、原画像が変更された後の
+        古いサムネイルはヒットしません（再生成時に _save_to_disk で上書きされます）。
+        
         Args:
             image_path: 原画像のパス
             size: サムネイルのサイズ (width, height)
-            cache_key: キャッシュキー
+            cache_key: キャッシュキー (パス・サイズ・更新時刻)
             
         Returns:
             QPixmap or None: 読み込まれたサムネイル画像、またはNone
@@ -557,8 +636,8 @@ class UnifiedThumbnailCache(BaseThumbnailCache):
             cursor = conn.cursor()
             
             cursor.execute(
-                "SELECT cache_path FROM thumbnails WHERE image_path = ? AND width = ? AND height = ?",
-                (image_path, size[0], size[1])
+                "SELECT cache_path FROM thumbnails WHERE cache_key = ?",
+                (cache_key,)
             )
             result = cursor.fetchone()
             
@@ -568,8 +647,8 @@ class UnifiedThumbnailCache(BaseThumbnailCache):
                     # アクセス時間とカウントを更新
                     cursor.execute(
                         "UPDATE thumbnails SET last_accessed = ?, access_count = access_count + 1 "
-                        "WHERE image_path = ? AND width = ? AND height = ?",
-                        (int(time.time()), image_path, size[0], size[1])
+                        "WHERE cache_key = ?",
+                        (int(time.time()), cache_key)
                     )
                     conn.commit()
                     
@@ -604,9 +683,10 @@ class UnifiedThumbnailCache(BaseThumbnailCache):
         """
         try:
             cache_path = self._get_disk_cache_path(image_path, size)
+            os.makedirs(os.path.dirname(cache_path), exist_ok=True)
             
             # サムネイルを保存
-            if not thumbnail.save(cache_path, "PNG"):
+            if not thumbnail.save(cache_path, self.disk_cache_format.upper(), self.disk_cache_quality):
                 logger.warning(f"サムネイル保存に失敗: {cache_path}")
                 return False
             
@@ -619,7 +699,7 @@ class UnifiedThumbnailCache(BaseThumbnailCache):
             
             # 既存エントリを確認
             cursor.execute(
-                "SELECT id FROM thumbnails WHERE image_path = ? AND width = ? AND height = ?",
+                "SELECT id, cache_path FROM thumbnails WHERE image_path = ? AND width = ? AND height = ?",
                 (image_path, size[0], size[1])
             )
             result = cursor.fetchone()
@@ -635,6 +715,16 @@ class UnifiedThumbnailCache(BaseThumbnailCache):
                     (cache_path, file_size, current_time, current_time, cache_key,
                      image_path, size[0], size[1])
                 )
+                # 保存先が変わった場合 (旧形式のPNGやシャーディング前のパスなど) は古いファイルを削除する
+                # (DBの参照が上書きされるため、残すとクリーンアップの対象にならない)
+                old_cache_path = result[1]
+                if old_cache_path and old_cache_path != cache_path:
+                    try:
+                        os.remove(old_cache_path)
+                    except FileNotFoundError:
+                        pass
+                    except OSError as e:
+                        logger.warning(f"古いキャッシュファイルを削除できませんでした: {old_cache_path} ({e})")
             else:
                 # 新規エントリを追加
                 cursor.execute(
@@ -655,37 +745,56 @@ class UnifiedThumbnailCache(BaseThumbnailCache):
             self.stats["errors"] += 1
             return False
     
-    def _update_db_access_time(self, image_path: str, size: Tuple[int, int], cache_key: str) -> bool:
+    def _touch_db_access_time(self, image_path: str, size: Tuple[int, int], cache_key: str) -> None:
         """
-        データベースのアクセス時間を更新
+        アクセス時間の更新を保留し、スレッドプールでの書き込みを予約
+        
+        メモリキャッシュのヒットはGUIスレッドからの呼び出しが多いため、
+        SQLiteへの書き込みは呼び出し元のスレッドでは行いません。
+        呼び出し側で cache_lock を保持していることを前提とします。
         
         Args:
             image_path: 原画像のパス
             size: サムネイルのサイズ
             cache_key: キャッシュキー
+        """
+        self._pending_access_updates.append((image_path, size[0], size[1]))
+        if not self._access_flush_scheduled:
+            self._access_flush_scheduled = True
+            QThreadPool.globalInstance().start(self._flush_access_updates)
+    
+    def _flush_access_updates(self) -> None:
+        """保留中のアクセス時間の更新を1回のトランザクションでデータベースに書き込む"""
+        with self.cache_lock:
+            pending, self._pending_access_updates = self._pending_access_updates, []
+            self._access_flush_scheduled = False
+        if pending:
+            self._update_db_access_times(pending)
+    
+    def _update_db_access_times(self, entries: List[Tuple[str, int, int]]) -> bool:
+        """
+        複数エントリのアクセス時間を1回のトランザクションで更新
+        
+        Args:
+            entries: (原画像のパス, 幅, 高さ) のリスト
             
         Returns:
             bool: 更新に成功した場合はTrue
         """
         try:
             conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            # アクセス時間とカウントを更新
-            cursor.execute(
-                "UPDATE thumbnails SET last_accessed = ?, access_count = access_count + 1 "
-                "WHERE image_path = ? AND width = ? AND height = ?",
-                (int(time.time()), image_path, size[0], size[1])
-            )
-            
-            affected = cursor.rowcount
-            conn.commit()
+            now = int(time.time())
+            with conn:
+                conn.executemany(
+                    "UPDATE thumbnails SET last_accessed = ?, access_count = access_count + 1 "
+                    "WHERE image_path = ? AND width = ? AND height = ?",
+                    [(now, image_path, width, height) for image_path, width, height in entries]
+                )
             conn.close()
-            
-            return affected > 0
+            return True
             
         except sqlite3.Error as e:
-            logger.error(f"アクセス時間更新エラー ({image_path}): {e}")
+            logger.error(f"アクセス時間一括更新エラー ({len(entries)}件): {e}")
             self.stats["errors"] += 1
             return False
     
@@ -813,8 +922,7 @@ class UnifiedThumbnailCache(BaseThumbnailCache):
                 # メモリキャッシュからも削除
                 if cache_key in self.memory_cache:
                     del self.memory_cache[cache_key]
-                    if cache_key in self.access_order:
-                        self.access_order.remove(cache_key)
+                    self._remove_from_access_order(cache_key)
                 
                 # データベースから削除
                 cursor.execute("DELETE FROM thumbnails WHERE id = ?", (entry_id,))
@@ -925,7 +1033,8 @@ class UnifiedThumbnailCache(BaseThumbnailCache):
                     self.cleanup_timer.stop()
                     logger.debug("クリーンアップタイマーを停止しました")
             
-            # データベースに統計情報を保存
+            # 保留中のアクセス時間の更新と統計情報をデータベースに保存
+            self._flush_access_updates()
             self._update_db_stats()
             
         except Exception:
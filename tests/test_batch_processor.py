@@ -0,0 +1,151 @@
+"""
+BatchProcessorのテストスクリプト
+
+処理待ちキュー (_PathQueue) の取り出し順序と、バッチ処理の結果の扱いをテストします。
+"""
+import os
+import time
+import unittest
+import tempfile
+import shutil
+from PySide6.QtWidgets import QApplication
+from PySide6.QtGui import QPixmap
+from PySide6.QtCore import QThreadPool
+
+import sys
+# プロジェクトルートディレクトリをパスに追加
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from models.unified_thumbnail_cache import UnifiedThumbnailCache
+from controllers.batch_processor import BatchProcessor, _PathQueue
+from controllers.worker_manager import WorkerManager
+
+# アプリケーションインスタンスを作成（Qtの要件）
+app = QApplication.instance() or QApplication([])
+
+
+def _drain(queue):
+    """キューが空になるまで取り出し、パスのリストを返す"""
+    return [queue.pop()[1] for _ in range(len(queue))]
+
+
+class TestPathQueue(unittest.TestCase):
+    """_PathQueueのテストクラス"""
+
+    def setUp(self):
+        self.paths = [f"img{i}.jpg" for i in range(6)]
+        self.queue = _PathQueue(self.paths)
+
+    def test_pop_keeps_original_order(self):
+        """優先度がない場合は元の順序で取り出されることのテスト"""
+        self.assertEqual(len(self.queue), 6)
+        self.assertEqual(self.queue.pop(), (0, "img0.jpg"))
+        self.assertEqual(_drain(self.queue), self.paths[1:])
+        self.assertEqual(len(self.queue), 0)
+        with self.assertRaises(IndexError):
+            self.queue.pop()
+
+    def test_bump(self):
+        """bumpした未処理の画像が先に取り出されることのテスト"""
+        self.assertTrue(self.queue.bump("img3.jpg", -1))
+        self.assertEqual(self.queue.pop(), (3, "img3.jpg"))
+        # 取り出し済み・存在しない画像は対象外
+        self.assertFalse(self.queue.bump("img3.jpg", -1))
+        self.assertFalse(self.queue.bump("missing.jpg", -1))
+        self.assertEqual(_drain(self.queue), ["img0.jpg", "img1.jpg", "img2.jpg", "img4.jpg", "img5.jpg"])
+
+    def test_bump_order_and_duplicates(self):
+        """優先度の小さい順、同じ優先度は元の順序で取り出され、重複してヒープに積まれないことのテスト"""
+        self.queue.bump("img5.jpg", 0)
+        self.queue.bump("img4.jpg", -1)
+        self.queue.bump("img2.jpg", 0)
+        # 同じか大きい優先度での bump は積み直さない
+        self.assertTrue(self.queue.bump("img4.jpg", -1))
+        self.assertTrue(self.queue.bump("img4.jpg", 0))
+        self.assertEqual(len(self.queue._priority), 3)
+        # より小さい優先度では積み直す
+        self.assertTrue(self.queue.bump("img5.jpg", -2))
+        self.assertEqual(len(self.queue._priority), 4)
+        self.assertEqual(_drain(self.queue),
+                         ["img5.jpg", "img4.jpg", "img2.jpg", "img0.jpg", "img1.jpg", "img3.jpg"])
+
+    def test_clear(self):
+        """clearでキューが空になることのテスト"""
+        self.queue.bump("img1.jpg", -1)
+        self.queue.clear()
+        self.assertEqual(len(self.queue), 0)
+        with self.assertRaises(IndexError):
+            self.queue.pop()
+
+
+class TestBatchProcessor(unittest.TestCase):
+    """BatchProcessorのテストクラス"""
+
+    def setUp(self):
+        """テスト前の準備"""
+        self.temp_dir = tempfile.mkdtemp(prefix="test_batch_processor_")
+        self.cache = UnifiedThumbnailCache(
+            memory_limit=100,
+            disk_cache_dir=os.path.join(self.temp_dir, 'cache'),
+            disk_cache_limit_mb=10,
+            cleanup_interval=1000
+        )
+        self.worker_manager = WorkerManager()
+        self.processor = BatchProcessor(self.worker_manager, self.cache, batch_size=4, max_concurrent=2)
+
+    def tearDown(self):
+        """テスト後のクリーンアップ"""
+        self.processor.cancel()
+        QThreadPool.globalInstance().waitForDone()
+        self.cache.clear(clear_disk=True)
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def _create_images(self, count):
+        """テスト用の画像を作成してパスのリストを返す"""
+        images_dir = os.path.join(self.temp_dir, 'images')
+        os.makedirs(images_dir, exist_ok=True)
+        paths = []
+        for i in range(count):
+            path = os.path.join(images_dir, f"{i}.png")
+            pixmap = QPixmap(400, 300)
+            pixmap.fill(0xFF000000 + i * 0x10)
+            pixmap.save(path, "PNG")
+            paths.append(path)
+        return paths
+
+    def test_stale_results_from_cancelled_batch_are_ignored(self):
+        """キャンセルしたバッチのワーカーの結果が次のバッチの結果として扱われないことのテスト"""
+        paths = self._create_images(6)
+        results = []
+        completed = []
+        self.processor.thumbnail_created.connect(lambda path, thumbnail: results.append(thumbnail.width()))
+        self.processor.batch_completed.connect(lambda: completed.append(True))
+
+        # 最初のバッチのワーカーを完了させ、結果のシグナルは未処理のまま次のバッチを開始する
+        self.processor.process_images(paths, (200, 200))
+        QThreadPool.globalInstance().waitForDone()
+        self.processor.process_images(paths, (64, 64))
+
+        deadline = time.time() + 20
+        while not completed and time.time() < deadline:
+            app.processEvents()
+            time.sleep(0.005)
+
+        self.assertTrue(completed, "バッチ処理が完了しませんでした")
+        self.assertEqual(len(results), len(paths))
+        self.assertEqual(set(results), {64}, "前のバッチのサムネイルが通知されました")
+
+    def test_worker_manager_cancel_all_cancels_batch(self):
+        """WorkerManager.cancel_all() で実行中のバッチもキャンセルされることのテスト"""
+        self.processor.process_images(self._create_images(6), (64, 64))
+        self.assertTrue(self.processor.is_processing)
+        cancel_event = self.processor._cancel_event
+
+        self.worker_manager.cancel_all()
+        self.assertFalse(self.processor.is_processing)
+        self.assertTrue(cancel_event.is_set(), "ワーカーのキャンセルイベントがセットされていません")
+        self.assertEqual(self.processor.get_status()["queued"], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+"""
+DirectoryScannerWorkerのテストスクリプト
+
+os.scandir による走査 (順次・並列) が os.walk + os.path.splitext と同じ結果を
+同じ順序で返すことをテストします。
+"""
+import os
+import unittest
+import tempfile
+import shutil
+
+import sys
+# プロジェクトルートディレクトリをパスに追加
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from controllers.directory_scanner import DirectoryScannerWorker
+
+
+class TestDirectoryScannerWorker(unittest.TestCase):
+    """DirectoryScannerWorkerのテストクラス"""
+
+    EXTENSIONS = [".jpg", ".jpeg", ".png"]
+
+    # テスト用のファイル (ディレクトリは自動で作成)
+    FILES = [
+        "a.jpg", "B.PNG", "notes.txt", ".jpg", "..png", ".hidden.jpeg", "noext", "archive.jpg.zip",
+        "sub1/c.jpeg", "sub1/.png", "sub1/deep/d.Jpg", "sub1/deep/e.gif",
+        "sub2/f.png", "sub2/g.tiff", "sub2/x..jpg",
+        "sub3/deeper/deepest/h.jpg",
+        "empty/",
+    ]
+
+    def setUp(self):
+        """テスト前の準備"""
+        self.temp_dir = tempfile.mkdtemp(prefix="test_directory_scanner_")
+        for relative_path in self.FILES:
+            path = os.path.join(self.temp_dir, relative_path)
+            if relative_path.endswith("/"):
+                os.makedirs(path, exist_ok=True)
+                continue
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            open(path, "wb").close()
+
+    def tearDown(self):
+        """テスト後のクリーンアップ"""
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def _reference(self, recursive=True):
+        """os.walk と os.path.splitext による従来のスキャン結果"""
+        extensions = {ext.lower() for ext in self.EXTENSIONS}
+        results = []
+        for dirpath, _, filenames in os.walk(self.temp_dir):
+            results.extend(os.path.join(dirpath, name) for name in filenames
+                           if os.path.splitext(name)[1].lower() in extensions)
+            if not recursive:
+                break
+        return results
+
+    def _scan(self, scanner_threads, recursive=True):
+        worker = DirectoryScannerWorker(self.temp_dir, self.EXTENSIONS, recursive=recursive)
+        worker.scanner_threads = scanner_threads
+        return worker.work()
+
+    def test_matches_os_walk(self):
+        """順次・並列のどちらでも os.walk と同じ結果を同じ順序で返すことのテスト"""
+        expected = self._reference()
+        self.assertEqual(len(expected), 8)
+        for scanner_threads in (1, 4):
+            with self.subTest(scanner_threads=scanner_threads):
+                self.assertEqual(self._scan(scanner_threads), expected)
+
+    def test_non_recursive(self):
+        """再帰しない場合は直下のファイルのみを返すことのテスト"""
+        self.assertEqual(self._scan(4, recursive=False), self._reference(recursive=False))
+
+    def test_missing_directory(self):
+        """存在しないディレクトリではFileNotFoundErrorになることのテスト"""
+        worker = DirectoryScannerWorker(os.path.join(self.temp_dir, "missing"), self.EXTENSIONS)
+        with self.assertRaises(FileNotFoundError):
+            worker.work()
+
+
+if __name__ == '__main__':
+    unittest.main()
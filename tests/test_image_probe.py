@@ -0,0 +1,101 @@
+"""
+画像ヘッダーの解析によるサイズ取得 (_fast_probe_size) のテストスクリプト
+
+Pillowで生成した各形式の画像について、ヘッダーから正しいサイズを取得できることをテストします。
+"""
+import os
+import unittest
+import tempfile
+import shutil
+
+from PIL import Image
+
+import sys
+# プロジェクトルートディレクトリをパスに追加
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from controllers.unified_thumbnail_worker import _fast_probe_size
+
+
+class TestFastProbeSize(unittest.TestCase):
+    """_fast_probe_sizeのテストクラス"""
+
+    # (ファイル名, Pillowの形式, モード, save() の追加引数)
+    SUPPORTED_CASES = [
+        ("rgb.png", "PNG", "RGB", {}),
+        ("rgba.png", "PNG", "RGBA", {}),
+        ("image.gif", "GIF", "P", {}),
+        ("image.bmp", "BMP", "RGB", {}),
+        ("baseline.jpg", "JPEG", "RGB", {}),
+        ("progressive.jpg", "JPEG", "RGB", {"progressive": True}),
+        ("lossy.webp", "WEBP", "RGB", {}),                # VP8
+        ("lossless.webp", "WEBP", "RGB", {"lossless": True}),  # VP8L
+        ("alpha.webp", "WEBP", "RGBA", {}),               # VP8X
+    ]
+
+    WIDTH = 1234
+    HEIGHT = 567
+
+    def setUp(self):
+        """テスト前の準備"""
+        self.temp_dir = tempfile.mkdtemp(prefix="test_image_probe_")
+
+    def tearDown(self):
+        """テスト後のクリーンアップ"""
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def _path(self, name):
+        return os.path.join(self.temp_dir, name)
+
+    def test_supported_formats(self):
+        """対応形式のサイズを取得できることのテスト"""
+        for name, fmt, mode, options in self.SUPPORTED_CASES:
+            with self.subTest(name=name):
+                path = self._path(name)
+                Image.new(mode, (self.WIDTH, self.HEIGHT)).save(path, fmt, **options)
+                self.assertEqual(_fast_probe_size(path), (self.WIDTH, self.HEIGHT))
+
+    def test_jpeg_with_large_exif(self):
+        """大きなEXIFセグメントの後ろにあるSOFマーカーを見つけられることのテスト"""
+        path = self._path("exif.jpg")
+        exif = Image.Exif()
+        exif[0x010E] = "x" * 60000  # ImageDescription
+        Image.new("RGB", (321, 123)).save(path, "JPEG", exif=exif.tobytes())
+        self.assertEqual(_fast_probe_size(path), (321, 123))
+
+    def test_unsupported_or_invalid_files(self):
+        """未対応の形式や壊れたヘッダーではNoneを返すことのテスト"""
+        tiff_path = self._path("image.tif")
+        Image.new("RGB", (10, 10)).save(tiff_path, "TIFF")
+
+        truncated_jpeg_path = self._path("truncated.jpg")
+        with open(truncated_jpeg_path, "wb") as f:
+            f.write(b"\xff\xd8\xff\xe0\x00")
+
+        truncated_png_path = self._path("truncated.png")
+        Image.new("RGB", (10, 10)).save(truncated_png_path, "PNG")
+        with open(truncated_png_path, "r+b") as f:
+            f.truncate(20)
+
+        corrupt_webp_path = self._path("corrupt.webp")
+        with open(corrupt_webp_path, "wb") as f:
+            f.write(b"RIFF\x00\x00\x00\x00WEBPVP8 " + b"\x00" * 16)
+
+        empty_path = self._path("empty.png")
+        open(empty_path, "wb").close()
+
+        cases = [
+            ("tiff", tiff_path),
+            ("truncated jpeg", truncated_jpeg_path),
+            ("truncated png", truncated_png_path),
+            ("corrupt webp", corrupt_webp_path),
+            ("empty", empty_path),
+            ("missing", self._path("missing.png")),
+        ]
+        for label, path in cases:
+            with self.subTest(case=label):
+                self.assertIsNone(_fast_probe_size(path))
+
+
+if __name__ == '__main__':
+    unittest.main()
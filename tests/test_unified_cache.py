@@ -8,6 +8,7 @@ import time
 import unittest
 import tempfile
 import shutil
+import sqlite3
 from PySide6.QtWidgets import QApplication
 from PySide6.QtGui import QPixmap
 from PySide6.QtCore import QSize
@@ -99,6 +100,70 @@ class TestUnifiedThumbnailCache(unittest.TestCase):
         none_result = self.cache.get_thumbnail("non_existent.png", test_size)
         self.assertIsNone(none_result, "存在しない画像でNoneを返すべきです")
     
+    def test_get_thumbnails_bulk(self):
+        """一括取得のテスト"""
+        test_size = (100, 100)
+        pixmap = QPixmap(100, 100)
+        pixmap.fill(0xFFCCCCCC)
+        self.cache.store_thumbnail(self.test_image_path, test_size, pixmap)
+        
+        results = self.cache.get_thumbnails_bulk(
+            [self.test_image_path, self.large_image_path, "non_existent.png"], test_size)
+        
+        # すべてのパスが結果に含まれることを確認
+        self.assertEqual(set(results.keys()),
+                         {self.test_image_path, self.large_image_path, "non_existent.png"})
+        self.assertIsNotNone(results[self.test_image_path], "キャッシュ済みのサムネイルを取得できませんでした")
+        self.assertEqual(results[self.test_image_path].width(), 100, "サムネイルの幅が正しくありません")
+        # 未キャッシュ・存在しない画像はNone
+        self.assertIsNone(results[self.large_image_path], "未キャッシュの画像でNoneを返すべきです")
+        self.assertIsNone(results["non_existent.png"], "存在しない画像でNoneを返すべきです")
+        
+        # メモリのみの検索でも同じ結果になることを確認
+        memory_results = self.cache.get_thumbnails_bulk(
+            [self.test_image_path, self.large_image_path], test_size, memory_only=True)
+        self.assertIsNotNone(memory_results[self.test_image_path], "メモリキャッシュから取得できませんでした")
+        self.assertIsNone(memory_results[self.large_image_path], "未キャッシュの画像でNoneを返すべきです")
+    
+    def test_disk_cache_invalidated_on_modification(self):
+        """原画像の更新後にディスクキャッシュの古いサムネイルを返さないことのテスト"""
+        test_size = (100, 100)
+        pixmap = QPixmap(100, 100)
+        pixmap.fill(0xFFCCCCCC)
+        self.cache.store_thumbnail(self.test_image_path, test_size, pixmap)
+        
+        # メモリキャッシュのみクリアしてディスクから取得できることを確認
+        self.cache.clear(clear_disk=False)
+        self.assertIsNotNone(self.cache.get_thumbnail(self.test_image_path, test_size),
+                             "ディスクキャッシュから取得できませんでした")
+        
+        # 原画像の更新時刻を変更するとキャッシュミスになることを確認
+        self.cache.clear(clear_disk=False)
+        stat = os.stat(self.test_image_path)
+        os.utime(self.test_image_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 5 * 10**9))
+        self.assertIsNone(self.cache.get_thumbnail(self.test_image_path, test_size),
+                          "更新された画像で古いサムネイルを返すべきではありません")
+    
+    def test_disk_cache_removes_replaced_file(self):
+        """保存先が変わったエントリを上書きすると古いキャッシュファイルが削除されることのテスト"""
+        test_size = (100, 100)
+        pixmap = QPixmap(100, 100)
+        pixmap.fill(0xFFCCCCCC)
+        self.cache.store_thumbnail(self.test_image_path, test_size, pixmap)
+
+        # 旧形式 (PNG・シャーディング前) のファイルを指すエントリを再現する
+        old_cache_path = os.path.join(self.cache_dir, "legacy.png")
+        pixmap.save(old_cache_path, "PNG")
+        conn = sqlite3.connect(self.cache.db_path)
+        with conn:
+            conn.execute("UPDATE thumbnails SET cache_path = ? WHERE image_path = ?",
+                         (old_cache_path, self.test_image_path))
+        conn.close()
+
+        self.cache.store_thumbnail(self.test_image_path, test_size, pixmap)
+        self.assertFalse(os.path.exists(old_cache_path), "古いキャッシュファイルが残っています")
+        self.assertTrue(os.path.exists(self.cache._get_disk_cache_path(self.test_image_path, test_size)))
+
     def test_memory_cache_limit(self):
         """メモリキャッシュの上限テスト"""
         # メモリキャッシュの上限を超えるサムネイルを保存
@@ -114,7 +179,23 @@ class TestUnifiedThumbnailCache(unittest.TestCase):
         # キャッシュのアイテム数が上限以下であることを確認
         self.assertLessEqual(stats['memory_cache_count'], 10, 
                            "メモリキャッシュのアイテム数が上限を超えています")
-    
+
+    def test_memory_cache_keeps_frequent_items(self):
+        """繰り返し取得されたサムネイルが一巡スキャンで追い出されないことのテスト"""
+        test_size = (50, 50)
+        pixmap = QPixmap(50, 50)
+        self.cache.store_thumbnail(self.test_image_path, test_size, pixmap)
+        for _ in range(2):
+            self.assertIsNotNone(self.cache.get_thumbnail(self.test_image_path, test_size))
+
+        # memory_limit (10) を超える数のサムネイルを一巡させる
+        for i in range(12):
+            self.cache.store_thumbnail(f"{self.test_image_path}_{i}", test_size, pixmap)
+
+        hot_key = self.cache._make_cache_key(self.test_image_path, test_size)
+        self.assertIn(hot_key, self.cache.memory_cache, "頻繁にアクセスされたサムネイルが追い出されました")
+        self.assertLessEqual(len(self.cache.memory_cache), 10)
+
     def test_worker_thumbnail_generation(self):
         """サムネイル生成ワーカーのテスト"""
         # ワーカーを作成
@@ -52,15 +52,14 @@ class Config:
                 "fallback_to_qt": True,   # libvipsが失敗した場合にQtにフォールバック
                 "downscale_large": True,  # 大きな画像はまず縮小してからサムネイル生成
                 "max_size_for_direct": 4096,  # 直接ロードする最大サイズ（ピクセル）
-                "webp_quality": 85,       # WebP出力時の品質（0-100）
-                "jpeg_quality": 90,       # JPEG出力時の品質（0-100）
+                "prefer_vips": True,      # 画像サイズに関係なくlibvips (縮小読み込み) を使用するか
                 "use_webp": True,         # WebP形式を使用するか
-                "concurrent_thumbnails": 8,  # 同時に処理するサムネイル数
+                "concurrent_thumbnails": 8,  # 同時に処理するサムネイル数（物理コア数が上限）
                 "thread_pool_size": 0,    # libvipsのスレッドプールサイズ（0=自動）
                 "vips_cache_max_mb": 1024,  # libvipsのキャッシュサイズ（MB）
                 "use_lanczos": True,      # Lanczos3リサンプリングを使用するか
-                "strip_metadata": True,   # メタデータを除去するか（サイズ削減）
-                "thumbnail_algorithm": "thumbnail",  # 'thumbnail'または'resize'
+                "preferred_resample": "lanczos",  # PILの縮小フィルタ（lanczos / bicubic / hamming）
+                "use_jpeg_draft": True,   # PILでJPEGを縮小読み込み (draft) するか
             },
         },
         
@@ -70,6 +69,8 @@ class Config:
             "disk_cache_limit_mb": 2000,  # ディスクキャッシュの最大サイズ（MB）
             "cleanup_interval_ms": 120000,  # クリーンアップ間隔（ms）
             "disk_cache_dir": "",  # 初期化時に設定される
+            "disk_format": "webp",  # ディスクキャッシュの保存形式 (webp, jpg, png)
+            "disk_quality": 85,  # ディスクキャッシュの画質 (webp/jpg)
             # キャッシュポリシー
             "policy": {
                 "auto_cleanup": True,    # 自動クリーンアップを有効化
@@ -109,6 +110,7 @@ class Config:
             "load_batch_size": 8, # 1回の読込バッチサイズ
             "progress_update_interval_ms": 500,  # 進捗更新間隔（ミリ秒）
             "worker_timeout_ms": 30000,  # ワーカータイムアウト（ミリ秒）
+            "scanner_threads": 4,  # ディレクトリスキャンの並列スレッド数
         },
         
         # メモリ管理
@@ -126,10 +128,11 @@ class Config:
             "hardware_acceleration": True,  # ハードウェアアクセラレーションを使用
             "vips": {
                 "enable": True,           # libvipsを有効化
-                "concurrency": 0,         # 0=自動、N=スレッド数
+                "concurrency": 1,         # ワーカーごとのスレッド数 (0=自動、N=スレッド数)
                 "cache_max_mb": 1024,     # キャッシュサイズ（MB）
                 "cache_max_files": 100,   # キャッシュするファイル数
-                "operation_cache": True,   # 操作キャッシュを有効化
+                "operation_cache": False,  # 操作キャッシュを有効化 (サムネイル生成では再利用しないため既定は無効)
+                "cache_max_ops": 100,     # キャッシュする操作数 (operation_cache有効時)
             },
         },
     }
@@ -444,7 +447,7 @@ class Config:
         """
         libvipsの設定を適用
         
-        環境変数を通じてlibvipsの動作を設定します。
+        環境変数とpyvipsのAPIを通じてlibvipsの動作を設定します。
         """
         # 設定を取得
         vips_config = self.get("performance.vips", {})
@@ -454,24 +457,43 @@ class Config:
             return
             
         # スレッドプールサイズを設定
-        concurrency = vips_config.get("concurrency", 0)
-        os.environ["VIPS_CONCURRENCY"] = str(concurrency)
-        
-        # キャッシュサイズを設定
-        cache_max_mb = vips_config.get("cache_max_mb", 1024)
-        os.environ["VIPS_CACHE_MAX"] = str(cache_max_mb)
+        # サムネイル生成は既にQtのワーカースレッドで並列化されているため、
+        # 各ワーカー内でlibvipsがさらにスレッドを生成しないよう既定値は1にする
+        # 起動前に環境変数 VIPS_CONCURRENCY が指定されている場合は、運用側の指定を最優先する
+        concurrency = vips_config.get("concurrency", 1)
+        env_concurrency = os.environ.setdefault("VIPS_CONCURRENCY", str(concurrency))
+        try:
+            concurrency = int(env_concurrency)
+        except ValueError:
+            logger.warning(f"VIPS_CONCURRENCY の値が不正です: {env_concurrency!r} (設定値 {concurrency} を使用)")
         
-        # キャッシュするファイル数を設定
-        cache_max_files = vips_config.get("cache_max_files", 100)
-        os.environ["VIPS_CACHE_MAX_FILES"] = str(cache_max_files)
+        # 環境変数はlibvipsの初期化時にしか読まれないため、API経由でも設定する
+        try:
+            import pyvips
+        except (ImportError, OSError):
+            pyvips = None
         
         # オペレーションキャッシュを設定
-        operation_cache = vips_config.get("operation_cache", True)
-        os.environ["VIPS_CACHE_TRACE"] = "1" if operation_cache else "0"
+        # サムネイル生成では同じ操作を再利用しない (結果はUnifiedThumbnailCacheに保存する) ため、
+        # 既定では無効にしてメモリとキャッシュのロック競合を避ける
+        operation_cache = vips_config.get("operation_cache", False)
+        cache_max_mb = vips_config.get("cache_max_mb", 1024) if operation_cache else 0
+        cache_max_files = vips_config.get("cache_max_files", 100) if operation_cache else 0
+        cache_max_ops = vips_config.get("cache_max_ops", 100) if operation_cache else 0
+        
+        if pyvips is not None:
+            try:
+                if concurrency > 0:
+                    pyvips.concurrency_set(concurrency)
+                pyvips.cache_set_max(cache_max_ops)
+                pyvips.cache_set_max_mem(cache_max_mb * 1024 * 1024)
+                pyvips.cache_set_max_files(cache_max_files)
+            except Exception as e:
+                logger.warning(f"libvipsの設定を適用できませんでした: {e}")
         
         logger.debug(
-            f"libvips設定: concurrency={concurrency}, "
-            f"cache_max_mb={cache_max_mb}, cache_max_files={cache_max_files}"
+            f"libvips設定: concurrency={concurrency}, operation_cache={operation_cache}, "
+            f"cache_max_ops={cache_max_ops}, cache_max_mb={cache_max_mb}, cache_max_files={cache_max_files}"
         )
 
 # 設定インスタンスのシングルトン